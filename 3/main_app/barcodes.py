@@ -0,0 +1,50 @@
+import hashlib
+import os
+from typing import Iterator, Optional
+
+BARCODE_MIN: int = 100000000
+BARCODE_MAX: int = 999999999
+
+_DOMAIN = BARCODE_MAX - BARCODE_MIN + 1  # 900 000 000 possible barcodes
+_HALF_BITS = 15  # 2 ** 30 > _DOMAIN
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+
+
+class BarcodeAllocator:
+    """
+    Hands out unique pseudo-random 9-digit barcodes without keeping them in memory.
+
+    The n-th barcode is a keyed permutation (a small Feistel network) of n, so
+    different n always give different barcodes and nothing has to be sampled up front.
+    """
+
+    def __init__(self, key: Optional[bytes] = None) -> None:
+        self.key = key if key is not None else os.urandom(16)
+
+    def _round(self, i: int, value: int) -> int:
+        digest = hashlib.blake2b(value.to_bytes(4, 'big'), key=self.key, digest_size=4,
+                                 person=i.to_bytes(16, 'big')).digest()
+        return int.from_bytes(digest, 'big') & _HALF_MASK
+
+    def _permute(self, value: int) -> int:
+        left, right = value >> _HALF_BITS, value & _HALF_MASK
+        for i in range(_ROUNDS):
+            left, right = right, left ^ self._round(i, right)
+        return (left << _HALF_BITS) | right
+
+    def barcode(self, n: int) -> int:
+        if not 0 <= n < _DOMAIN:
+            raise ValueError(f"Only {_DOMAIN} barcodes are available")
+
+        # Cycle walking: the permutation is over 2 ** 30 values, so repeat until it lands inside the range
+        value = self._permute(n)
+        while value >= _DOMAIN:
+            value = self._permute(value)
+        return BARCODE_MIN + value
+
+    def barcodes(self, start: int = 0) -> Iterator[int]:
+        n = start
+        while True:
+            yield self.barcode(n)
+            n += 1
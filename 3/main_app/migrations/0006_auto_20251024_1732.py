@@ -1,22 +1,31 @@
 # Generated by Django 5.0.4 on 2025-10-24 17:32
-import random
-
 from django.db import migrations
 
+from main_app.barcodes import BarcodeAllocator
+
+BATCH_SIZE = 1000
+
+
 def add_barcode(apps, schema_editor):
     Product = apps.get_model('main_app', 'Product')
-    products = Product.objects.all()
-    barcodes = random.sample(range(100000000, 1000000000), len(products))
+    barcodes = BarcodeAllocator().barcodes()
+
+    last_pk = 0
+    while True:
+        # Keyset pagination: WHERE id > last_pk ORDER BY id LIMIT BATCH_SIZE
+        chunk = list(Product.objects.filter(pk__gt=last_pk).order_by('pk').only('pk')[:BATCH_SIZE])
+        if not chunk:
+            break
+
+        for p in chunk:
+            p.barcode = next(barcodes)
+        Product.objects.bulk_update(chunk, ['barcode'])
+        last_pk = chunk[-1].pk
 
-    for i in range(len(products)):
-        p = products[i]
-        p.barcode = barcodes[i]
-        p.save()
 def remove_barcode (apps, schema_editor):
     Product = apps.get_model('main_app', 'Product')
-    for p in Product.objects.all():
-        p.barcode=None
-    p.save()
+    # barcode is NOT NULL, so reset it to the value 0005 filled in when the column was added
+    Product.objects.update(barcode=1)
 
 class Migration(migrations.Migration):
 
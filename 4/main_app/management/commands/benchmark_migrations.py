@@ -0,0 +1,184 @@
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+APP_LABEL = 'main_app'
+BATCH_SIZE = 10000
+
+
+def seed_shoes(apps, rows):
+    Shoe = apps.get_model(APP_LABEL, 'Shoe')
+    Shoe.objects.bulk_create(
+        (Shoe(brand=f"Brand {i % 500}", size=36 + i % 12) for i in range(rows)),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def seed_people(apps, rows):
+    Person = apps.get_model(APP_LABEL, 'Person')
+    Person.objects.bulk_create(
+        (Person(name=f"Person {i}", age=i % 90) for i in range(rows)),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def seed_items(apps, rows):
+    Item = apps.get_model(APP_LABEL, 'Item')
+    Item.objects.bulk_create(
+        (Item(name=f"Item {i}", price=i % 50, quantity=1 + i % 5) for i in range(rows)),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def seed_smartphones(apps, rows):
+    Smartphone = apps.get_model(APP_LABEL, 'Smartphone')
+    brands = ['Apple', 'Samsung', 'Nokia', 'OnePlus', 'Xiaomi', 'Motorola']
+    Smartphone.objects.bulk_create(
+        (Smartphone(brand=brands[i % len(brands)]) for i in range(rows)),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def seed_orders(apps, rows):
+    Order = apps.get_model(APP_LABEL, 'Order')
+    statuses = ['Pending', 'Completed', 'Cancelled']
+    start = date(2024, 1, 1)
+    Order.objects.bulk_create(
+        (
+            Order(
+                product_name=f"Product {i % 100}",
+                customer_name=f"Customer {i}",
+                order_date=start + timedelta(days=i % 365),
+                status=statuses[i % len(statuses)],
+                amount=1 + i % 3,
+                product_price=10 + i % 90,
+            )
+            for i in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+# migration: (previous migration, models to empty before seeding, seed function)
+MIGRATIONS = {
+    '0003_migrate_unique_brands': ('0002_uniquebrands', ['Shoe', 'UniqueBrands'], seed_shoes),
+    '0010_migrate_person_age_group': ('0009_person', ['Person'], seed_people),
+    '0012_set_rarity_on_items': ('0011_item', ['Item'], seed_items),
+    '0014_migrate_smartphone_price_and_category': ('0013_smartphone', ['Smartphone'], seed_smartphones),
+    '0016_migrate_order_warranty_and_delivery': ('0015_order', ['Order'], seed_orders),
+}
+
+
+def migrate_to(name):
+    executor = MigrationExecutor(connection)
+    executor.migrate([(APP_LABEL, name)])
+    return executor.loader.project_state((APP_LABEL, name)).apps
+
+
+def measure(func, reset):
+    """
+    Runs func twice: once for the wall time and the query count, then, after reset() has put
+    the data back, once under tracemalloc for the peak memory.
+    Tracing every allocation slows ORM code down a lot, so it is kept out of the timed run.
+    """
+    queries = 0
+
+    # Counts instead of logging, a log of every SQL string would show up in the memory peak
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    result = {'error': None}
+    # Keep the migrations' progress output out of the JSON report
+    with redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_queries):
+                func()
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            return result
+        finally:
+            result['seconds'] = round(time.perf_counter() - start, 4)
+        result['queries'] = queries
+
+        reset()
+        tracemalloc.start()
+        try:
+            func()
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds N rows per affected model in a throwaway test database and times the "
+        "RunPython migrations forward and backward (wall time, query count, peak memory) as JSON. "
+        "Every direction runs twice, the peak memory comes from a separate traced run. "
+        "Queries made by parallel workers are not counted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 100000, 1000000])
+        parser.add_argument('--migrations', nargs='+', choices=list(MIGRATIONS), default=list(MIGRATIONS))
+        parser.add_argument('--output', help="JSON file to write the results to (default: stdout)")
+        parser.add_argument('--keepdb', action='store_true', help="Reuse the test database between runs")
+
+    def handle(self, *args, **options):
+        # Never touch the real data, everything runs in the test database
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        results = []
+        try:
+            for name in options['migrations']:
+                previous, models, seed = MIGRATIONS[name]
+                for rows in options['rows']:
+                    def setup():
+                        # Setup can run other migrations too, their progress output goes to stderr as well
+                        with redirect_stdout(sys.stderr):
+                            apps = migrate_to(previous)
+                            for model_name in models:
+                                apps.get_model(APP_LABEL, model_name).objects.all().delete()
+                            seed(apps, rows)
+
+                    try:
+                        setup()
+                    except Exception as e:
+                        # e.g. a later migration in the way can't be reversed
+                        results.append({'migration': name, 'rows': rows, 'error': f"{type(e).__name__}: {e}"})
+                        self.stderr.write(f"{name} {rows} rows: setup failed, {type(e).__name__}: {e}")
+                        continue
+
+                    # A forward run can delete rows, so it is repeated on freshly seeded data
+                    forward = measure(lambda: migrate_to(name), reset=setup)
+                    backward = measure(lambda: migrate_to(previous), reset=lambda: migrate_to(name))
+
+                    results.append({
+                        'migration': name,
+                        'rows': rows,
+                        'forward': forward,
+                        'backward': backward,
+                    })
+                    self.stderr.write(
+                        f"{name} {rows} rows: forward {forward['seconds']}s, backward {backward['seconds']}s"
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        report = json.dumps({'vendor': connection.vendor, 'results': results}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(report)
+        else:
+            self.stdout.write(report)
@@ -1,32 +1,15 @@
 # Generated by Django 5.0.4 on 2025-10-26 13:24
 
 from django.db import migrations
+from django.db.models import Q
 
+from main_app.operations import RulesRunPython
 
-def set_age_group(apps, schema_editor):
-    PersonModel = apps.get_model('main_app', 'Person')
-
-    # TODO: research F object and do the update in one query
-    for p in PersonModel.objects.all():
-        if p.age < 13:
-            p.age_group = "Child"
-        elif p.age < 18:
-            p.age_group = "Teen"
-        else:
-            p.age_group = "Adult"
-
-        p.save()
-
-
-def reverse_age_group(apps, schema_editor):
-    PersonModel = apps.get_model('main_app', 'Person')
-    default_field = PersonModel._meta.get_field('age_group').default
-
-    # TODO: research bulk update
-    for p in PersonModel.objects.all():
-        p.age_group = default_field
-        p.save()
 
+AGE_GROUP_RULES = [
+    (Q(age__lt=13), "Child"),
+    (Q(age__lt=18), "Teen"),
+]
 
 
 class Migration(migrations.Migration):
@@ -36,8 +19,10 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.RunPython(
-            code=set_age_group,
-            reverse_code=reverse_age_group,
+        RulesRunPython(
+            'main_app', 'Person',
+            field='age_group',
+            rules=AGE_GROUP_RULES,
+            otherwise="Adult",
         )
     ]
\ No newline at end of file
@@ -1,26 +1,15 @@
 # Generated by Django 5.0.4 on 2025-10-26 13:46
 
 from django.db import migrations
+from django.db.models import Q
 
-def set_rarity(apps, schema_editor):
-    Item = apps.get_model('main_app', 'Item')
-    for item in Item.objects.all():
-        if item.price < 10:
-            item.rarity = "Rare"
-        elif item.price <= 20:
-            item.rarity = "Very Rare"
-        elif item.price <= 30:
-            item.rarity = "Extremely Rare"
-        else:
-            item.rarity = "Mega Rare"
-        item.save()
+from main_app.operations import RulesRunPython
 
-def reverse_rarity(apps, schema_editor):
-    Item = apps.get_model('main_app', 'Item')
-    default_rarity = Item._meta.get_field('rarity').default
-    for item in Item.objects.all():
-        item.rarity = default_rarity
-        item.save()
+RARITY_RULES = [
+    (Q(price__lt=10), "Rare"),
+    (Q(price__lte=20), "Very Rare"),
+    (Q(price__lte=30), "Extremely Rare"),
+]
 
 class Migration(migrations.Migration):
 
@@ -29,5 +18,5 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        migrations.RunPython(set_rarity, reverse_rarity)
+        RulesRunPython('main_app', 'Item', 'rarity', RARITY_RULES, otherwise="Mega Rare")
     ]
\ No newline at end of file
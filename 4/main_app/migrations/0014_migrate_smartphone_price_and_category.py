@@ -3,58 +3,50 @@
 
 from django.db import migrations
 
+from main_app.operations import BatchedRunPython, migration_workers
+
 
 MULTIPLIER: int = 120
 PRICE_THRESHOLD: int = 750
+# Single process unless MIGRATION_WORKERS is set, see migration_workers()
+WORKERS: int = migration_workers()
 
 
-def set_price(apps, schema_editor):
-    SmartPhoneModel = apps.get_model('main_app', 'Smartphone')
-
-    # TODO: research bulk_update
-    for phone in SmartPhoneModel.objects.all():
-        phone.price = len(phone.brand) * MULTIPLIER
-        phone.save()
-
-
-def set_category(apps, schema_editor):
-    SmartPhoneModel = apps.get_model('main_app', 'Smartphone')
-
-    # TODO: research bulk_update
-    for phone in SmartPhoneModel.objects.all():
-        if phone.price <= PRICE_THRESHOLD:
-            phone.category = "Cheap"
-        else:
-            phone.category = "Expensive"
+def set_price(phone):
+    phone.price = len(phone.brand) * MULTIPLIER
 
-        phone.save()
 
+def set_category(phone):
+    if phone.price <= PRICE_THRESHOLD:
+        phone.category = "Cheap"
+    else:
+        phone.category = "Expensive"
 
-def set_fields(apps, schema_editor):
-    set_price(apps, schema_editor)
-    set_category(apps, schema_editor)
 
+def set_fields(phone):
+    set_price(phone)
+    set_category(phone)
 
-def reverse_fields(apps, schema_editor):
-    SmartPhoneModel = apps.get_model('main_app', 'Smartphone')
-    category_default = SmartPhoneModel._meta.get_field('category').default
-    price_default = SmartPhoneModel._meta.get_field('price').default
 
-    for phone in SmartPhoneModel.objects.all():
-        phone.category = category_default
-        phone.price = price_default
-        phone.save()
+def reverse_fields(phone):
+    phone.category = phone._meta.get_field('category').default
+    phone.price = phone._meta.get_field('price').default
 
 
 class Migration(migrations.Migration):
+    # Parallel workers commit their own pk ranges
+    atomic = WORKERS == 1
 
     dependencies = [
         ('main_app', '0013_smartphone'),
     ]
 
     operations = [
-        migrations.RunPython(
-            code=set_fields,
-            reverse_code=reverse_fields,
+        BatchedRunPython(
+            'main_app', 'Smartphone',
+            transform=set_fields,
+            fields=['price', 'category'],
+            reverse_transform=reverse_fields,
+            workers=WORKERS,
         )
     ]
\ No newline at end of file
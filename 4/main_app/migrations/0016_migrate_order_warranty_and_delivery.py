@@ -5,6 +5,8 @@ from datetime import timedelta
 from django.db import migrations
 from django.db import models
 
+from main_app.operations import BatchedRunPython, DELETE
+
 
 class OrderStatusChoices(models.TextChoices):
     PENDING = 'Pending', 'Pending'
@@ -12,34 +14,28 @@ class OrderStatusChoices(models.TextChoices):
     CANCELLED = 'Cancelled', 'Cancelled'
 
 
-def set_fields(apps, schema_editor):
-    OrderModel = apps.get_model('main_app', 'Order')
-
-    for order in OrderModel.objects.all():
-        if order.status == OrderStatusChoices.PENDING:
-            print("0rder dd", order.order_date)
-            order.delivery = order.order_date + timedelta(days=3)
-            order.save()
-        elif order.status == OrderStatusChoices.COMPLETED:
-            order.warranty = '24 months'
-            order.save()
-        elif order.status == OrderStatusChoices.CANCELLED:
-            order.delete()
-
-
-def reverse_function(apps, schema_editor):
-    pass
+def set_fields(order):
+    if order.status == OrderStatusChoices.PENDING:
+        order.delivery = order.order_date + timedelta(days=3)
+    elif order.status == OrderStatusChoices.COMPLETED:
+        order.warranty = '24 months'
+    elif order.status == OrderStatusChoices.CANCELLED:
+        return DELETE
 
 
 class Migration(migrations.Migration):
+    # Every chunk of orders is committed on its own, see checkpoint below
+    atomic = False
 
     dependencies = [
         ('main_app', '0015_order'),
     ]
 
     operations = [
-        migrations.RunPython(
-            code=set_fields,
-            reverse_code=reverse_function,
+        BatchedRunPython(
+            'main_app', 'Order',
+            transform=set_fields,
+            fields=['delivery', 'warranty'],
+            checkpoint='0016_migrate_order_warranty_and_delivery',
         )
     ]
\ No newline at end of file
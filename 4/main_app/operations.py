@@ -0,0 +1,411 @@
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, migrations, transaction
+from django.db.models import Case, F, Max, Min, Q, Value, When
+
+# Returned by a transform when the row has to be deleted instead of updated
+DELETE = object()
+
+PROGRESS_TABLE = 'main_app_migration_progress'
+
+
+def print_progress(model_name: str, done: int, total: int, unit: str = 'rows') -> None:
+    print(f"  {model_name}: {done}/{total} {unit}")
+
+
+def _ensure_progress_table(using: str) -> None:
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {PROGRESS_TABLE} ("
+            f"name VARCHAR(255) PRIMARY KEY, "
+            f"last_pk BIGINT NOT NULL)"
+        )
+
+
+def get_checkpoint(name: str, using: str = DEFAULT_DB_ALIAS) -> Optional[int]:
+    _ensure_progress_table(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"SELECT last_pk FROM {PROGRESS_TABLE} WHERE name = %s", [name])
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def save_checkpoint(name: str, last_pk: int, using: str = DEFAULT_DB_ALIAS) -> None:
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {PROGRESS_TABLE} WHERE name = %s", [name])
+        cursor.execute(f"INSERT INTO {PROGRESS_TABLE} (name, last_pk) VALUES (%s, %s)", [name, last_pk])
+
+
+def clear_checkpoint(name: str, using: str = DEFAULT_DB_ALIAS) -> None:
+    _ensure_progress_table(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {PROGRESS_TABLE} WHERE name = %s", [name])
+
+
+def _apply_chunk(manager, chunk: list, transform: Callable, fields: list) -> int:
+    changed = []
+    to_delete = []
+    for obj in chunk:
+        before = [getattr(obj, f) for f in fields]
+        if transform(obj) is DELETE:
+            to_delete.append(obj.pk)
+        elif [getattr(obj, f) for f in fields] != before:
+            changed.append(obj)
+
+    if changed:
+        manager.bulk_update(changed, fields)
+    if to_delete:
+        manager.filter(pk__in=to_delete).delete()
+
+    return len(changed)
+
+
+def run_in_chunks(
+        model,
+        transform: Callable,
+        fields: Iterable[str],
+        batch_size: int = 1000,
+        queryset=None,
+        progress: Optional[Callable] = print_progress,
+        checkpoint: Optional[str] = None,
+        using: str = DEFAULT_DB_ALIAS,
+) -> int:
+    """
+    Walks the model in pk order, batch_size rows at a time, and calls transform(obj) for every row.
+    Only the rows whose fields were changed by the transform are written, with one bulk_update per chunk:
+
+    UPDATE ... SET field = CASE WHEN id = 1 THEN ... END WHERE id IN (...);
+
+    With a checkpoint name every chunk is committed in its own transaction and the last
+    processed pk is stored in the progress table, so a failed run resumes where it stopped
+    and locks are only held for one chunk. Call it outside of a transaction for that.
+
+    Returns the number of updated rows.
+    """
+    fields = list(fields)
+    manager = model._default_manager.db_manager(using)
+    qs = queryset if queryset is not None else manager.all()
+    last_pk = get_checkpoint(checkpoint, using) if checkpoint else None
+    total = qs.count()
+    done = qs.filter(pk__lte=last_pk).count() if last_pk is not None else 0
+    updated = 0
+
+    while True:
+        chunk_qs = qs.order_by('pk')
+        if last_pk is not None:
+            chunk_qs = chunk_qs.filter(pk__gt=last_pk)  # keyset, no OFFSET
+        chunk = list(chunk_qs[:batch_size])
+        if not chunk:
+            break
+
+        last_pk = chunk[-1].pk
+        with transaction.atomic(using=using):
+            updated += _apply_chunk(manager, chunk, transform, fields)
+            if checkpoint:
+                save_checkpoint(checkpoint, last_pk, using)
+
+        done += len(chunk)
+        if progress:
+            progress(model.__name__, done, total)
+
+    if checkpoint:
+        clear_checkpoint(checkpoint, using)
+
+    return updated
+
+
+def split_pk_ranges(model, parts: int, using: str = DEFAULT_DB_ALIAS) -> List[Tuple[int, int]]:
+    """
+    Splits [min(pk), max(pk)] into up to parts disjoint, inclusive (low, high) ranges.
+    """
+    bounds = model._default_manager.db_manager(using).aggregate(low=Min('pk'), high=Max('pk'))
+    low, high = bounds['low'], bounds['high']
+    if low is None:
+        return []
+
+    step = max(1, -(-(high - low + 1) // parts))  # ceil division
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+# Set in the parent right before the pool forks, the workers inherit it.
+# Historical models from a migration can't be pickled, so they are never sent to the workers.
+_parallel_job = {}
+
+
+def _run_pk_range(pk_range: Tuple[int, int]) -> Tuple[Tuple[int, int], int, Optional[str]]:
+    job = _parallel_job
+    low, high = pk_range
+    try:
+        manager = job['model']._default_manager.db_manager(job['using'])
+        updated = run_in_chunks(
+            job['model'], job['transform'], job['fields'], job['batch_size'],
+            queryset=manager.filter(pk__gte=low, pk__lte=high),
+            progress=None,
+            using=job['using'],
+        )
+    except Exception:
+        return pk_range, 0, traceback.format_exc()
+    finally:
+        connections.close_all()
+    return pk_range, updated, None
+
+
+def run_in_parallel(
+        model,
+        transform: Callable,
+        fields: Iterable[str],
+        workers: int = 4,
+        batch_size: int = 1000,
+        using: str = DEFAULT_DB_ALIAS,
+        progress: Optional[Callable] = print_progress,
+) -> dict:
+    """
+    Splits the pk space into disjoint ranges and runs run_in_chunks over them in a pool of
+    worker processes, every worker with its own database connection.
+    No two workers ever touch the same row, so they can't deadlock on each other.
+
+    Workers commit their own chunks, so this must not run inside a transaction
+    (the migration needs atomic = False). Relies on fork, so it works on Linux/macOS only.
+
+    Returns {'updated': rows, 'ranges': done ranges, 'errors': [((low, high), traceback), ...]}.
+    """
+    fields = list(fields)
+    if connections[using].in_atomic_block:
+        raise RuntimeError("run_in_parallel can't run inside a transaction, set atomic = False")
+
+    ranges = split_pk_ranges(model, workers * 4, using)
+    result = {'updated': 0, 'ranges': 0, 'errors': []}
+    if not ranges:
+        return result
+
+    _parallel_job.update(model=model, transform=transform, fields=fields, batch_size=batch_size, using=using)
+    # Forked children must not share the parent's open connections
+    connections.close_all()
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as executor:
+            for pk_range, updated, error in executor.map(_run_pk_range, ranges):
+                result['ranges'] += 1
+                result['updated'] += updated
+                if error is not None:
+                    result['errors'].append((pk_range, error))
+                if progress:
+                    progress(model.__name__, result['ranges'], len(ranges), unit='pk ranges')
+    finally:
+        _parallel_job.clear()
+
+    return result
+
+
+def fork_available() -> bool:
+    # run_in_parallel needs fork, Windows only has spawn
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def migration_workers() -> int:
+    """
+    Number of worker processes for parallel data migrations. It is opt-in, through the
+    MIGRATION_WORKERS setting or environment variable (MIGRATION_WORKERS=4 python manage.py migrate).
+    Without it, or where fork is not available, migrations run in a single process.
+    """
+    workers = int(getattr(settings, 'MIGRATION_WORKERS', None) or os.environ.get('MIGRATION_WORKERS') or 1)
+    return workers if workers > 1 and fork_available() else 1
+
+
+def batched(
+        app_label: str,
+        model_name: str,
+        transform: Callable,
+        fields: Iterable[str],
+        batch_size: int = 1000,
+        checkpoint: Optional[str] = None,
+        workers: int = 1,
+) -> Callable:
+    """
+    Turns a per-row transform into a RunPython function (apps, schema_editor).
+    Falls back to a single process when workers > 1 but fork is not available.
+    """
+    def code(apps, schema_editor):
+        model = apps.get_model(app_label, model_name)
+        using = schema_editor.connection.alias
+
+        if workers > 1 and fork_available():
+            result = run_in_parallel(model, transform, fields, workers, batch_size, using)
+            if result['errors']:
+                report = "\n".join(f"pk {low}-{high}:\n{error}" for (low, high), error in result['errors'])
+                raise RuntimeError(f"{len(result['errors'])} pk ranges of {model_name} failed:\n{report}")
+            return
+
+        run_in_chunks(model, transform, fields, batch_size, checkpoint=checkpoint, using=using)
+
+    return code
+
+
+class BatchedRunPython(migrations.RunPython):
+    """
+    RunPython that applies per-row transform functions in chunks with bulk_update,
+    both forward and backward.
+
+    BatchedRunPython(
+        'main_app', 'Person',
+        transform=set_age_group, fields=['age_group'],
+        reverse_transform=reset_age_group,
+    )
+
+    Passing checkpoint='some_name' makes it resumable: every chunk is committed on its own,
+    so the migration has to set atomic = False. The same goes for workers > 1,
+    which spreads disjoint pk ranges over that many processes.
+    """
+
+    def __init__(
+            self,
+            app_label: str,
+            model_name: str,
+            transform: Callable,
+            fields: Iterable[str],
+            reverse_transform: Optional[Callable] = None,
+            reverse_fields: Optional[Iterable[str]] = None,
+            batch_size: int = 1000,
+            checkpoint: Optional[str] = None,
+            workers: int = 1,
+            **kwargs,
+    ) -> None:
+        fields = list(fields)
+        code = batched(app_label, model_name, transform, fields, batch_size, checkpoint, workers)
+
+        if reverse_transform is not None:
+            reverse_code = batched(
+                app_label, model_name, reverse_transform,
+                reverse_fields if reverse_fields is not None else fields,
+                batch_size,
+                f"{checkpoint}_reverse" if checkpoint else None,
+                workers,
+            )
+        else:
+            reverse_code = migrations.RunPython.noop
+
+        if checkpoint or workers > 1:
+            kwargs.setdefault('atomic', False)
+
+        super().__init__(code, reverse_code, **kwargs)
+
+
+def compile_rules(field: str, rules: Sequence[Tuple[Union[Q, dict], Any]], otherwise: Any = None) -> Case:
+    """
+    Compiles ordered (condition, value) rules into one CASE expression.
+    The first matching rule wins, just like an if/elif chain.
+    Rows that match no rule get otherwise, or keep their value when otherwise is None.
+
+    compile_rules('age_group', [(Q(age__lt=13), 'Child'), (Q(age__lt=18), 'Teen')], otherwise='Adult')
+
+    CASE WHEN age < 13 THEN 'Child' WHEN age < 18 THEN 'Teen' ELSE 'Adult' END
+    """
+    whens = []
+    for condition, value in rules:
+        if isinstance(condition, dict):
+            condition = Q(**condition)
+        whens.append(When(condition, then=Value(value)))
+
+    default = F(field) if otherwise is None else Value(otherwise)
+    return Case(*whens, default=default)
+
+
+class RulesRunPython(migrations.RunPython):
+    """
+    RunPython for threshold style data migrations. The rules become one set-based statement:
+
+    UPDATE ... SET field = CASE WHEN ... THEN ... ELSE ... END;
+
+    and the reverse sets the field back to its default in one statement:
+
+    UPDATE ... SET field = <default>;
+    """
+
+    def __init__(
+            self,
+            app_label: str,
+            model_name: str,
+            field: str,
+            rules: Sequence[Tuple[Union[Q, dict], Any]],
+            otherwise: Any = None,
+            **kwargs,
+    ) -> None:
+        rules = list(rules)
+
+        def code(apps, schema_editor):
+            model = apps.get_model(app_label, model_name)
+            manager = model._default_manager.db_manager(schema_editor.connection.alias)
+            manager.update(**{field: compile_rules(field, rules, otherwise)})
+
+        def reverse_code(apps, schema_editor):
+            model = apps.get_model(app_label, model_name)
+            default = model._meta.get_field(field).get_default()
+            manager = model._default_manager.db_manager(schema_editor.connection.alias)
+            manager.update(**{field: default})
+
+        super().__init__(code, reverse_code, **kwargs)
+
+
+def populate_distinct(source_model, source_field: str, target_model, target_field: str,
+                      using: str = DEFAULT_DB_ALIAS) -> int:
+    """
+    Fills a "unique values" lookup table on the database side, no rows cross the wire:
+
+    INSERT INTO target (target_field)
+    SELECT DISTINCT source_field FROM source WHERE source_field IS NOT NULL
+    ON CONFLICT DO NOTHING;
+
+    Values already in the target are skipped. Returns the number of inserted rows.
+    """
+    connection = connections[using]
+    qn = connection.ops.quote_name
+    source_column = source_model._meta.get_field(source_field).column
+    target_column = target_model._meta.get_field(target_field).column
+
+    sql = (
+        f"INSERT INTO {qn(target_model._meta.db_table)} ({qn(target_column)}) "
+        f"SELECT DISTINCT {qn(source_column)} FROM {qn(source_model._meta.db_table)} "
+        f"WHERE {qn(source_column)} IS NOT NULL "
+        f"ON CONFLICT DO NOTHING"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.rowcount
+
+
+class DistinctValuesRunPython(migrations.RunPython):
+    """
+    RunPython that fills a denormalized lookup table with the distinct values of a column
+    (see populate_distinct) and empties it again with one DELETE on the way back.
+
+    DistinctValuesRunPython('main_app', 'Shoe', 'brand', 'UniqueBrands')
+    """
+
+    def __init__(
+            self,
+            app_label: str,
+            source_model_name: str,
+            source_field: str,
+            target_model_name: str,
+            target_field: Optional[str] = None,
+            **kwargs,
+    ) -> None:
+        target_field = target_field or source_field
+
+        def code(apps, schema_editor):
+            populate_distinct(
+                apps.get_model(app_label, source_model_name), source_field,
+                apps.get_model(app_label, target_model_name), target_field,
+                using=schema_editor.connection.alias,
+            )
+
+        def reverse_code(apps, schema_editor):
+            target = apps.get_model(app_label, target_model_name)
+            # No signals or relations on the lookup table, so this is a single DELETE FROM
+            target._default_manager.db_manager(schema_editor.connection.alias).all().delete()
+
+        super().__init__(code, reverse_code, **kwargs)
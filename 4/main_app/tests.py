@@ -1,3 +1,73 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TransactionTestCase, override_settings
+
+from main_app.models import Person
+from main_app.operations import batched, get_checkpoint, migration_workers, run_in_chunks
+
+
+class RunInChunksCheckpointTests(TransactionTestCase):
+    # Every chunk commits on its own, so this needs real transactions
+    def setUp(self):
+        Person.objects.bulk_create(Person(name=f"Person {i}", age=i) for i in range(10))
+        self.pks = list(Person.objects.order_by('pk').values_list('pk', flat=True))
+
+    def test_failed_run_resumes_after_the_last_committed_chunk(self):
+        fail_at = self.pks[6]
+
+        def failing(person):
+            if person.pk == fail_at:
+                raise RuntimeError("boom")
+            person.age_group = 'Done'
+
+        with self.assertRaises(RuntimeError):
+            run_in_chunks(Person, failing, ['age_group'], batch_size=3, progress=None, checkpoint='test_people')
+
+        # The first two chunks are committed, the failed third one is rolled back
+        self.assertEqual(get_checkpoint('test_people'), self.pks[5])
+        self.assertEqual(
+            list(Person.objects.order_by('pk').values_list('age_group', flat=True)),
+            ['Done'] * 6 + ['No age group'] * 4,
+        )
+
+        seen = []
+
+        def recording(person):
+            seen.append(person.pk)
+            person.age_group = 'Done'
+
+        updated = run_in_chunks(Person, recording, ['age_group'], batch_size=3, progress=None, checkpoint='test_people')
+
+        self.assertEqual(seen, self.pks[6:])
+        self.assertEqual(updated, 4)
+        self.assertFalse(Person.objects.exclude(age_group='Done').exists())
+        self.assertIsNone(get_checkpoint('test_people'))
+
+    def test_without_checkpoint_runs_everything(self):
+        updated = run_in_chunks(Person, lambda p: setattr(p, 'age_group', 'Done'), ['age_group'], batch_size=4, progress=None)
+        self.assertEqual(updated, 10)
+        self.assertIsNone(get_checkpoint('test_people'))
+
+
+class MigrationWorkersTests(TransactionTestCase):
+    def test_single_process_by_default(self):
+        with mock.patch.dict('os.environ', {}, clear=True):
+            self.assertEqual(migration_workers(), 1)
+
+    @override_settings(MIGRATION_WORKERS=4)
+    def test_opt_in_needs_fork(self):
+        with mock.patch('main_app.operations.fork_available', return_value=True):
+            self.assertEqual(migration_workers(), 4)
+        with mock.patch('main_app.operations.fork_available', return_value=False):
+            self.assertEqual(migration_workers(), 1)
+
+    def test_batched_falls_back_to_one_process_without_fork(self):
+        Person.objects.bulk_create(Person(name=f"Person {i}", age=i) for i in range(5))
+        code = batched('main_app', 'Person', lambda p: setattr(p, 'age_group', 'Done'), ['age_group'], workers=4)
+        schema_editor = mock.Mock(connection=mock.Mock(alias='default'))
+        apps = mock.Mock(get_model=lambda app_label, model_name: Person)
+        with mock.patch('main_app.operations.fork_available', return_value=False), \
+                mock.patch('main_app.operations.run_in_parallel') as run_in_parallel:
+            code(apps, schema_editor)
+        run_in_parallel.assert_not_called()
+        self.assertFalse(Person.objects.exclude(age_group='Done').exists())
@@ -8,6 +8,8 @@ django.setup()
 
 # Import your models here
 from main_app.models import Student
+from main_app.reports import render, stream_rows
+from main_app.text_updates import replace_email_domain, rewrite_unique_text
 
 # Run and print your queries
 
@@ -36,20 +38,30 @@ def add_students():
 # add_students()
 # print(Student.objects.all())
 
+# Loading a big export, e.g. students.csv with a student_id,first_name,last_name,birth_date,email header:
+# from main_app.loaders import load_students
+# report = load_students('students.csv')
+# print(f"{report['inserted']} students added, {report['duplicates']} duplicates, "
+#       f"{report['invalid']} invalid rows, {report['rows_per_second']} rows/sec")
+
 
 def get_students_info():
-    all = Student.objects.all()
-    result = ''
-    for a in all:
-        result += f"\nStudent №{a.student_id}: {a.first_name} {a.last_name}; Email: {a.email}"
-    return result
+    return render(stream_rows(
+        Student.objects.all(),
+        ['student_id', 'first_name', 'last_name', 'email'],
+        "\nStudent №{}: {} {}; Email: {}",
+    ))
 # print(get_students_info())
 
 def update_students_emails():
-    all = Student.objects.all()
-    for a in all:
-        a.email = a.email.split("@")[0] + '@uni-students.com'
-        a.save()
+    """
+    UPDATE main_app_student
+    SET email = CASE WHEN email LIKE '%@%' THEN CONCAT(SUBSTR(email, 1, STRPOS(email, '@')), 'uni-students.com')
+                     ELSE CONCAT(email, '@uni-students.com') END;
+
+    Returns {'updated': ..., 'conflicts': [(student_id, old email, new email), ...]}
+    """
+    return rewrite_unique_text(Student.objects.all(), 'email', replace_email_domain('email', 'uni-students.com'))
 
 # update_students_emails()
 # for student in Student.objects.all():
@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+import time
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from django.db import connection, transaction
+
+from main_app.models import Student
+
+BATCH_SIZE: int = 10000
+COLUMNS: Tuple[str, ...] = ('student_id', 'first_name', 'last_name', 'birth_date', 'email')
+STAGING_TABLE = 'main_app_student_staging'
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """
+    Streams student records from a .csv file (with a header row), a .jsonl file
+    (one object per line) or a .json file with a list of objects.
+    """
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    elif path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith('.json'):
+        # A JSON list can't be streamed without a parser dependency, use .jsonl for big files
+        with open(path, encoding='utf-8') as f:
+            yield from json.load(f)
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+
+
+def batches(records: Iterable[dict], size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _text(value) -> str:
+    return '' if value is None else str(value).strip()
+
+
+def clean_batch(batch: List[dict], dates: Dict[str, date]) -> Tuple[List[tuple], List[tuple]]:
+    """
+    Validates a batch and converts it to rows in COLUMNS order.
+    Birth dates repeat a lot, so every distinct string is parsed only once (dates is shared between batches).
+    Returns (rows, errors), an error is (record, message).
+    """
+    rows = []
+    errors = []
+    for record in batch:
+        if not isinstance(record, dict):
+            errors.append((record, "expected an object with the student fields"))
+            continue
+        # JSON can give numbers where the csv gives strings, e.g. "student_id": 123
+        student_id = _text(record.get('student_id'))
+        first_name = _text(record.get('first_name'))
+        last_name = _text(record.get('last_name'))
+        email = _text(record.get('email'))
+        raw_date = record.get('birth_date') or None
+
+        if not student_id or len(student_id) > 10:
+            errors.append((record, "student_id must have 1 to 10 characters"))
+            continue
+        if not first_name or not last_name or len(first_name) > 50 or len(last_name) > 50:
+            errors.append((record, "first_name and last_name must have 1 to 50 characters"))
+            continue
+        if '@' not in email or len(email) > 254:
+            errors.append((record, "invalid email"))
+            continue
+
+        birth_date = None
+        if raw_date is not None and not isinstance(raw_date, str):
+            errors.append((record, f"invalid birth_date {raw_date!r}, expected YYYY-MM-DD"))
+            continue
+        if raw_date is not None:
+            birth_date = dates.get(raw_date)
+            if birth_date is None:
+                try:
+                    birth_date = dates[raw_date] = date.fromisoformat(raw_date)
+                except ValueError:
+                    errors.append((record, f"invalid birth_date {raw_date!r}, expected YYYY-MM-DD"))
+                    continue
+
+        rows.append((student_id, first_name, last_name, birth_date, email))
+
+    return rows, errors
+
+
+def _copy(cursor, sql: str, rows: List[tuple]) -> None:
+    buffer = io.StringIO()
+    # In CSV mode COPY reads an unquoted empty value as NULL, which is what csv writes for None
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):  # psycopg2
+        raw.copy_expert(sql, buffer)
+    else:  # psycopg 3
+        with raw.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def load_students(path: str, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Bulk loads students from a file with PostgreSQL COPY FROM STDIN.
+
+    The rows are copied into a temporary staging table first and merged with
+
+    INSERT INTO main_app_student SELECT ... FROM staging ON CONFLICT DO NOTHING;
+
+    so a student_id or email that already exists (in the table or earlier in the file) is skipped,
+    the first one wins. Everything runs in one transaction.
+    """
+    if connection.vendor != 'postgresql':
+        raise RuntimeError("load_students needs PostgreSQL (COPY FROM STDIN)")
+
+    table = Student._meta.db_table
+    columns = ', '.join(Student._meta.get_field(c).column for c in COLUMNS)
+    start = time.perf_counter()
+    dates: Dict[str, date] = {}
+    errors: List[tuple] = []
+    staged = 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {STAGING_TABLE} "
+            f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        # Keeps the file order, so the merge can let the first duplicate win
+        cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN line_no BIGSERIAL")
+        for batch in batches(read_records(path), batch_size):
+            rows, batch_errors = clean_batch(batch, dates)
+            errors.extend(batch_errors)
+            _copy(cursor, f"COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH (FORMAT csv)", rows)
+            staged += len(rows)
+
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) "
+            f"SELECT {columns} FROM {STAGING_TABLE} ORDER BY line_no "
+            f"ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+
+    seconds = time.perf_counter() - start
+    return {
+        'inserted': inserted,
+        'duplicates': staged - inserted,
+        'invalid': len(errors),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(inserted / seconds) if seconds else inserted,
+    }
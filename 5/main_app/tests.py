@@ -0,0 +1,75 @@
+from datetime import date
+
+from django.test import TestCase
+
+from main_app.loaders import clean_batch
+from main_app.models import Student
+from main_app.text_updates import replace_email_domain, rewrite_unique_text
+
+
+class RewriteEmailDomainTests(TestCase):
+    def rewrite(self, queryset=None):
+        queryset = Student.objects.all() if queryset is None else queryset
+        return rewrite_unique_text(queryset, 'email', replace_email_domain('email', 'uni-students.com'))
+
+    def emails(self):
+        return dict(Student.objects.values_list('student_id', 'email'))
+
+    def test_replaces_the_domain(self):
+        Student.objects.create(student_id='S1', first_name='A', last_name='B', email='ann@mail.com')
+        Student.objects.create(student_id='S2', first_name='A', last_name='B', email='noat')
+        result = self.rewrite()
+        self.assertEqual(result, {'updated': 2, 'conflicts': []})
+        self.assertEqual(self.emails(), {'S1': 'ann@uni-students.com', 'S2': 'noat@uni-students.com'})
+
+    def test_row_that_already_has_the_new_value_is_kept(self):
+        # S1 sorts first by pk, but S2 already has the new value, so S1 is the one reported
+        Student.objects.create(student_id='S1', first_name='A', last_name='B', email='ann@mail.com')
+        Student.objects.create(student_id='S2', first_name='A', last_name='B', email='ann@uni-students.com')
+        result = self.rewrite()
+        self.assertEqual(result['conflicts'], [('S1', 'ann@mail.com', 'ann@uni-students.com')])
+        self.assertEqual(self.emails(), {'S1': 'ann@mail.com', 'S2': 'ann@uni-students.com'})
+
+    def test_lowest_pk_wins_among_new_duplicates(self):
+        Student.objects.create(student_id='S3', first_name='A', last_name='B', email='bob@gmail.com')
+        Student.objects.create(student_id='S1', first_name='A', last_name='B', email='bob@yahoo.com')
+        Student.objects.create(student_id='S2', first_name='A', last_name='B', email='bob@abv.bg')
+        result = self.rewrite()
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(
+            result['conflicts'],
+            [('S2', 'bob@abv.bg', 'bob@uni-students.com'), ('S3', 'bob@gmail.com', 'bob@uni-students.com')],
+        )
+        self.assertEqual(self.emails()['S1'], 'bob@uni-students.com')
+
+    def test_value_taken_outside_the_queryset_is_never_used(self):
+        Student.objects.create(student_id='S1', first_name='A', last_name='B', email='cat@mail.com')
+        Student.objects.create(student_id='S2', first_name='A', last_name='B', email='cat@uni-students.com')
+        Student.objects.create(student_id='S3', first_name='A', last_name='B', email='dan@mail.com')
+        result = self.rewrite(Student.objects.exclude(student_id='S2'))
+        self.assertEqual(result, {'updated': 1, 'conflicts': [('S1', 'cat@mail.com', 'cat@uni-students.com')]})
+        self.assertEqual(
+            self.emails(),
+            {'S1': 'cat@mail.com', 'S2': 'cat@uni-students.com', 'S3': 'dan@uni-students.com'},
+        )
+
+
+class CleanBatchTests(TestCase):
+    def test_numbers_are_read_as_text(self):
+        rows, errors = clean_batch(
+            [{'student_id': 123, 'first_name': 'Ann', 'last_name': 'Lee', 'birth_date': '2001-02-03', 'email': 'ann@mail.com'}],
+            {},
+        )
+        self.assertEqual(rows, [('123', 'Ann', 'Lee', date(2001, 2, 3), 'ann@mail.com')])
+        self.assertEqual(errors, [])
+
+    def test_bad_values_are_reported_not_raised(self):
+        batch = [
+            {'student_id': 'S1', 'first_name': 'Ann', 'last_name': 'Lee', 'birth_date': 20010203, 'email': 'ann@mail.com'},
+            {'student_id': 'S2', 'first_name': 'Bob', 'last_name': 'Lee', 'birth_date': '03.02.2001', 'email': 'bob@mail.com'},
+            ['not', 'an', 'object'],
+            {'student_id': 'S3', 'first_name': 'Cat', 'last_name': 'Lee', 'email': 'cat@mail.com'},
+        ]
+        rows, errors = clean_batch(batch, {})
+        self.assertEqual(rows, [('S3', 'Cat', 'Lee', None, 'cat@mail.com')])
+        self.assertEqual([record for record, _ in errors], batch[:3])
@@ -0,0 +1,71 @@
+from typing import List, Tuple
+
+from django.db.models import Case, CharField, Count, Expression, Value, When
+from django.db.models.functions import Concat, StrIndex, Substr
+
+
+def replace_email_domain(field: str, new_domain: str) -> Expression:
+    """
+    SQL expression for "keep everything up to and including @, then the new domain",
+    a value without @ keeps all of it as the local part (like email.split("@")[0] did):
+
+    CASE WHEN email LIKE '%@%' THEN CONCAT(SUBSTR(email, 1, STRPOS(email, '@')), 'uni-students.com')
+         ELSE CONCAT(email, '@', 'uni-students.com') END
+    """
+    return Case(
+        When(
+            **{f'{field}__contains': '@'},
+            then=Concat(Substr(field, 1, StrIndex(field, Value('@'))), Value(new_domain)),
+        ),
+        default=Concat(field, Value('@'), Value(new_domain)),
+        output_field=CharField(),
+    )
+
+
+def rewrite_unique_text(queryset, field: str, expression: Expression) -> dict:
+    """
+    Sets field = expression for every row of the queryset in one UPDATE,
+    where field has a unique constraint.
+
+    Rows whose new value would clash with another row are left as they are and reported
+    instead of failing the whole UPDATE: when several rows get the same new value only one
+    is updated (the one that already has it, else the lowest pk), and a value already used
+    by a row outside the queryset is never taken.
+
+    Returns {'updated': rows, 'conflicts': [(pk, old value, new value), ...]}.
+    """
+    model = queryset.model
+    new_values = queryset.annotate(new_value=expression)
+
+    # New values that more than one row of the queryset would get
+    duplicated = (
+        new_values.order_by()
+        .values('new_value')
+        .annotate(rows=Count('pk'))
+        .filter(rows__gt=1)
+        .values('new_value')
+    )
+    # New values already used by rows that are not updated
+    taken = (
+        model._default_manager.exclude(pk__in=queryset.values('pk'))
+        .filter(**{f'{field}__in': new_values.values('new_value')})
+        .values_list(field, flat=True)
+    )
+    taken = set(taken)
+
+    candidates = (
+        new_values.filter(new_value__in=duplicated) | new_values.filter(new_value__in=taken)
+    ).values_list('pk', field, 'new_value')
+    # A skipped row keeps its old value, so a row that already has the new value must be the one kept
+    candidates = sorted(candidates, key=lambda row: (row[2], row[1] != row[2], row[0]))
+
+    conflicts: List[Tuple] = []
+    kept = set()
+    for pk, old_value, new_value in candidates:
+        if new_value in taken or new_value in kept:
+            conflicts.append((pk, old_value, new_value))
+        else:
+            kept.add(new_value)
+
+    updated = queryset.exclude(pk__in=[pk for pk, _, _ in conflicts]).update(**{field: expression})
+    return {'updated': updated, 'conflicts': conflicts}
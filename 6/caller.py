@@ -1,9 +1,14 @@
 import os
+import json
+import base64
 import django
 from decimal import Decimal
+from typing import List, Optional, Tuple
 
-from django.db import models
-from django.db.models import QuerySet, Case, When, F, Value
+from django.db import connection, models, transaction
+from django.db.models import QuerySet, Case, When, F, Value, ExpressionWrapper
+from django.db.models.functions import Cast, Mod, Round
+from django.db.models.lookups import Exact, GreaterThan
 
 # Set up Django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "orm_skeleton.settings")
@@ -11,6 +16,7 @@ django.setup()
 
 # Import your models here
 from main_app.models import Pet, Artifact, Location, Car, Task, HotelRoom, Character
+from main_app.reports import render, stream_rows
 # Create queries within functions
 
 def create_pet(name: str, species: str):
@@ -75,11 +81,46 @@ def show_all_locations():
     ORDER BY id DESC;
     """
 
-    result = ''
-    for location in Location.objects.all():
-        result += f"\n{location.name} has a population of {location.population}!"
+    return render(stream_rows(
+        Location.objects.order_by('-id'),
+        ['name', 'population'],
+        "\n{} has a population of {}!",
+    ))
 
-    return result
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'id': last_id}).encode()).decode()
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))['id'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def list_locations(cursor: Optional[str] = None, page_size: int = 20) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of locations, newest id first. Pass the returned cursor to get the next page,
+    it is None on the last page.
+
+    SELECT id, name, population FROM locations
+    WHERE id < <last id of the previous page>
+    ORDER BY id DESC
+    LIMIT page_size + 1;
+
+    Unlike OFFSET, the database jumps straight to the page through the primary key index,
+    so page 1000 costs the same as page 1.
+    """
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+
+    locations = Location.objects.order_by('-id')
+    if cursor is not None:
+        locations = locations.filter(id__lt=decode_cursor(cursor))
+
+    # One extra row tells whether there is a next page
+    rows = list(locations.values('id', 'name', 'population')[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]['id']) if len(rows) > page_size else None
+
+    return [{'name': r['name'], 'population': r['population']} for r in rows[:page_size]], next_cursor
 
 def new_capital():
     """
@@ -104,15 +145,68 @@ def delete_first_location():
     Location.objects.first().delete()
 
 # print(show_all_locations())
+# page, next_page = list_locations(page_size=2)
+# print(page, list_locations(next_page, page_size=2))
 # print(new_capital())
 # print(get_capitals())
 
+def year_discount(year: int) -> int:
+    # 2014 -> 2 + 0 + 1 + 4 = 7, the discount in percent
+    return sum(int(d) for d in str(year))
+
+def round_half_even(units, divisor: int):
+    """
+    units / divisor for positive integers, rounded to the nearest integer with ties to even,
+    the way Decimal.quantize rounds when Django saves a DecimalField from Python
+    (numeric columns in PostgreSQL round ties away from zero instead):
+
+    units / 100 + CASE WHEN MOD(units, 100) > 50 THEN 1
+                       WHEN MOD(units, 100) = 50 AND MOD(units / 100, 2) = 1 THEN 1
+                       ELSE 0 END
+    """
+    quotient = ExpressionWrapper(units / Value(divisor), output_field=models.BigIntegerField())
+    remainder = Mod(units, Value(divisor))
+    half = divisor // 2
+    return quotient + Case(
+        When(GreaterThan(remainder, half), then=Value(1)),
+        When(Exact(remainder, half) & Exact(Mod(quotient, Value(2)), 1), then=Value(1)),
+        default=Value(0),
+        output_field=models.BigIntegerField(),
+    )
+
 def apply_discount():
-    cars = Car.objects.all()
-    for car in cars:
-        sum_year = Decimal(str(sum(int(d) for d in str(car.year)) / 100))
-        car.price_with_discount = car.price - (car.price * sum_year)
-        car.save()
+    """
+    The discount only depends on the year, so it is computed once per distinct year.
+    The math is done in whole cents, so it is exact and ties round to even like the old per-row save
+    (5008.50 - 9% = 4557.735 -> 4557.74):
+
+    UPDATE cars
+    SET price_with_discount = ROUND_HALF_EVEN(ROUND(price * 100) * (100 - CASE
+        WHEN year = 2014 THEN 7
+        WHEN year = 2020 THEN 4
+        ...
+    END), 100) / 100.0
+    WHERE year IN (2014, 2020, ...);
+
+    ROUND_HALF_EVEN is the expression from round_half_even() above.
+    """
+    years = list(Car.objects.order_by().values_list('year', flat=True).distinct())
+    percents = [When(year=y, then=Value(year_discount(y))) for y in years]
+    if not percents:
+        return
+
+    percent = Case(*percents, output_field=models.IntegerField())
+    cents = Cast(Round(F('price') * 100), models.BigIntegerField())
+    # In 1/100 of a cent, exact for any price
+    units = ExpressionWrapper(cents * (Value(100) - percent), output_field=models.BigIntegerField())
+    # / 100.0 and not / 100, both databases would divide two integers without decimals.
+    # A whole number of cents as a float converts back to the exact 2 decimal value
+    new_price = ExpressionWrapper(
+        round_half_even(units, 100) / Value(100.0),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2),
+    )
+    # A year inserted after the read above has no WHEN, the CASE would give NULL for it
+    Car.objects.filter(year__in=years).update(price_with_discount=new_price)
 
 def get_recent_cars():
     """
@@ -143,14 +237,60 @@ def complete_odd_tasks():
         odd_task.is_finished = True
         odd_task.save()
 
+class ShiftTable(dict):
+    """
+    str.translate table that shifts every character 3 code points back ('Z' -> 'W').
+    Printable ASCII is filled in up front, anything else is added the first time it is seen.
+    """
+
+    def __init__(self, shift: int = 3):
+        super().__init__((i, i - shift) for i in range(32, 127))
+        self.shift = shift
+
+    def __missing__(self, key: int) -> int:
+        self[key] = key - self.shift
+        return self[key]
+
+DECODE_TABLE = ShiftTable()
+
+def decode(text: str) -> str:
+    return text.translate(DECODE_TABLE)
+
 def encode_and_replace(text: str, task_title: str):
-    decoded = "".join(map(chr, [(ord(c) - 3) for c in text]))
+    decoded = decode(text)
     task = Task.objects.get(title=task_title)
     task.description = decoded
     task.save()
 
+def encode_and_replace_many(pairs, batch_size: int = 1000) -> List[str]:
+    """
+    Batch version of encode_and_replace for (encoded_text, task_title) pairs.
+    Per chunk of pairs:
+
+    SELECT * FROM tasks WHERE title IN (...);
+    UPDATE tasks SET description = CASE WHEN id = ... THEN ... END WHERE id IN (...);
+
+    Every task with a matching title is updated, when a title comes twice the last text wins.
+    Returns the titles that matched no task.
+    """
+    unmatched = []
+    pairs = list(pairs)
+    for start in range(0, len(pairs), batch_size):
+        decoded = {title: decode(text) for text, title in pairs[start:start + batch_size]}
+
+        tasks = list(Task.objects.filter(title__in=decoded.keys()).only('id', 'title'))
+        for task in tasks:
+            task.description = decoded[task.title]
+        Task.objects.bulk_update(tasks, ['description'])
+
+        found = {task.title for task in tasks}
+        unmatched.extend(title for title in decoded if title not in found)
+
+    return unmatched
+
 # encode_and_replace("Zdvk#wkh#glvkhv$", "Sample Task")
 # print(Task.objects.get(title='Sample Task').description)
+# print(encode_and_replace_many([("Zdvk#wkh#glvkhv$", "Sample Task"), ("Fohdq#wkh#urrp", "No Such Task")]))
 
 def get_deluxe_rooms():
     rooms = HotelRoom.objects.filter(room_type='Deluxe')
@@ -163,18 +303,36 @@ def get_deluxe_rooms():
 # print(get_deluxe_rooms())
 
 def increase_room_capacity():
-    rooms = HotelRoom.objects.filter(is_reserved=True)
-    for room in rooms:
-        try:
-            previous_room = HotelRoom.objects.get(id=(room.id - 1))
-        except HotelRoom.DoesNotExist:
-            previous_room = None
-
-        if not previous_room:
-            room.capacity = room.capacity + room.id
-        else:
-            room.capacity = room.capacity + previous_room.capacity
-        room.save()
+    """
+    Every reserved room gets the capacity of the room with the previous id added
+    (or its own id when there is no such room), going up by id. A reserved previous room
+    has already been increased, so along a run of consecutive reserved ids the increments add up:
+
+    new[i] = old[i] + new[i - 1]  =>  new[i] = base + old[first] + ... + old[i]
+
+    where base is the capacity of the room before the run, or the first id of the run.
+    That is a running SUM over each run, so all rooms are updated in one UPDATE ... FROM.
+    """
+    table = HotelRoom._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH reserved AS (
+                SELECT id, capacity, id - ROW_NUMBER() OVER (ORDER BY id) AS run
+                FROM {table}
+                WHERE is_reserved
+            ),
+            runs AS (
+                SELECT id,
+                       SUM(capacity) OVER (PARTITION BY run ORDER BY id) AS running_capacity,
+                       MIN(id) OVER (PARTITION BY run) AS first_id
+                FROM reserved
+            )
+            UPDATE {table}
+            SET capacity = runs.running_capacity + COALESCE(previous_room.capacity, runs.first_id)
+            FROM runs
+            LEFT JOIN {table} AS previous_room ON previous_room.id = runs.first_id - 1
+            WHERE {table}.id = runs.id
+        """)
 
 # increase_room_capacity()
 
@@ -194,37 +352,30 @@ def delete_last_room():
 
 def update_characters() -> None:
     """
-    UPDATE characters
-    SET
-        level = CASE
-            WHEN class_name = 'Mage' THEN level + 3
-            ELSE level
-        END
-        intelligence = CASE ... END
+    Only the rows that change are touched, every other row keeps its tuple (no dead row versions):
+
+    UPDATE characters SET level = level + 3, intelligence = intelligence - 7
+    WHERE class_name = 'Mage';
+
+    UPDATE characters SET hit_points = hit_points / 2, dexterity = dexterity + 4
+    WHERE class_name = 'Warrior';
+
+    UPDATE characters SET inventory = 'The inventory is empty'
+    WHERE class_name IN ('Assassin', 'Scout') AND inventory <> 'The inventory is empty';
     """
 
-    Character.objects.update(
-        level=Case(
-            When(class_name='Mage', then=F('level') + 3),
-            default=F('level')
-        ),
-        intelligence=Case(
-            When(class_name='Mage', then=F('intelligence') - 7),
-            default=F('intelligence')
-        ),
-        hit_points=Case(
-            When(class_name='Warrior', then=F('hit_points') / 2),
-            default=F('hit_points')
-        ),
-        dexterity=Case(
-            When(class_name='Warrior', then=F('dexterity') + 4),
-            default=F('dexterity')
-        ),
-        inventory=Case(
-            When(class_name__in=['Assassin', 'Scout'], then=Value('The inventory is empty')),
-            default=F('inventory')
+    with transaction.atomic():
+        Character.objects.filter(class_name='Mage').update(
+            level=F('level') + 3,
+            intelligence=F('intelligence') - 7,
         )
-    )
+        Character.objects.filter(class_name='Warrior').update(
+            hit_points=F('hit_points') / 2,
+            dexterity=F('dexterity') + 4,
+        )
+        Character.objects.filter(class_name__in=['Assassin', 'Scout']).exclude(
+            inventory='The inventory is empty',
+        ).update(inventory='The inventory is empty')
 
 class CharacterTypeChoices(models.TextChoices):
     MAGE = "Mage", "Mage"
@@ -233,7 +384,7 @@ class CharacterTypeChoices(models.TextChoices):
     SCOUT = "Scout", "Scout"
     FUSION = "Fusion", "Fusion"
 
-def fuse_characters(first_character: Character, second_character: Character) -> None:
+def fused_character(first_character: Character, second_character: Character) -> Character:
     inventory = None
 
     if first_character.class_name in [CharacterTypeChoices.MAGE, CharacterTypeChoices.SCOUT]:
@@ -241,7 +392,7 @@ def fuse_characters(first_character: Character, second_character: Character) ->
     elif first_character.class_name in [CharacterTypeChoices.WARRIOR, CharacterTypeChoices.ASSASSIN]:
         inventory = "Dragon Scale Armor, Excalibur"
 
-    Character.objects.create(
+    return Character(
         name=first_character.name + ' ' + second_character.name,
         class_name=CharacterTypeChoices.FUSION,
         level=(first_character.level + second_character.level) // 2,
@@ -252,8 +403,46 @@ def fuse_characters(first_character: Character, second_character: Character) ->
         inventory=inventory
     )
 
-    first_character.delete()
-    second_character.delete()
+def fuse_characters(first_character: Character, second_character: Character) -> None:
+    fuse_many([(first_character, second_character)])
+
+def fuse_many(pairs) -> List[Character]:
+    """
+    Fuses every (first, second) pair in one transaction, so a crash can't leave
+    both the fused character and its sources:
+
+    SELECT ... FROM characters WHERE id IN (...) FOR UPDATE;
+    INSERT INTO characters (...) VALUES (...), (...), ...;
+    DELETE FROM characters WHERE id IN (...);
+
+    Raises ValueError, before anything is written, when a character is unsaved, already deleted,
+    fused with itself or used in more than one pair. Returns the created characters.
+    """
+    pairs = list(pairs)
+    ids = []
+    for first_character, second_character in pairs:
+        if first_character.pk is None or second_character.pk is None:
+            raise ValueError("Only saved characters can be fused")
+        if first_character.pk == second_character.pk:
+            raise ValueError(f"Character {first_character.pk} can't be fused with itself")
+        ids.extend([first_character.pk, second_character.pk])
+
+    if len(set(ids)) != len(ids):
+        raise ValueError("A character can be fused only once")
+
+    fused = [fused_character(first, second) for first, second in pairs]
+
+    with transaction.atomic():
+        # Locks the sources, so a concurrent batch can't fuse them too
+        existing = set(Character.objects.select_for_update().filter(pk__in=ids).values_list('pk', flat=True))
+        missing = set(ids) - existing
+        if missing:
+            raise ValueError(f"Characters {sorted(missing)} don't exist")
+
+        created = Character.objects.bulk_create(fused)
+        Character.objects.filter(pk__in=ids).delete()
+
+    return created
 
 def grand_dexterity() -> None:
     """
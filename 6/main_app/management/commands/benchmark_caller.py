@@ -0,0 +1,251 @@
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.db.models import Case, F, PositiveIntegerField, TextField, Value, When
+
+import caller
+from main_app.models import Car, Character, HotelRoom
+
+BATCH_SIZE = 10000
+
+
+# apply_discount
+
+def seed_cars(rows):
+    Car.objects.bulk_create(
+        (
+            Car(model=f"Model {i % 300}", year=1990 + i % 35, color='Black',
+                price=Decimal(10000 + i % 90000) / 2)
+            for i in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def apply_discount_per_row():
+    # The old caller.apply_discount: one UPDATE per car
+    for car in Car.objects.all():
+        sum_year = Decimal(str(sum(int(d) for d in str(car.year)) / 100))
+        car.price_with_discount = car.price - (car.price * sum_year)
+        car.save()
+
+
+def car_discounts():
+    return list(Car.objects.order_by('pk').values_list('price_with_discount', flat=True))
+
+
+# increase_room_capacity
+
+def seed_rooms(rows):
+    HotelRoom.objects.bulk_create(
+        (
+            HotelRoom(room_number=100 + i, room_type='Standard', capacity=1 + i % 4, amenities='TV',
+                      price_per_night=100, is_reserved=i % 5 in (1, 2, 3))
+            for i in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    # Gaps in the ids, so some reserved rooms have no previous room
+    HotelRoom.objects.filter(room_number__endswith='7').delete()
+
+
+def increase_room_capacity_per_row():
+    # The old caller.increase_room_capacity: one SELECT and one UPDATE per reserved room
+    for room in HotelRoom.objects.filter(is_reserved=True):
+        try:
+            previous_room = HotelRoom.objects.get(id=(room.id - 1))
+        except HotelRoom.DoesNotExist:
+            previous_room = None
+
+        if not previous_room:
+            room.capacity = room.capacity + room.id
+        else:
+            room.capacity = room.capacity + previous_room.capacity
+        room.save()
+
+
+def room_capacities():
+    return list(HotelRoom.objects.order_by('pk').values_list('capacity', flat=True))
+
+
+# update_characters
+
+def seed_characters(rows):
+    classes = ['Mage', 'Warrior', 'Assassin', 'Scout', 'Fusion']
+    Character.objects.bulk_create(
+        (
+            Character(name=f"Character {i}", class_name=classes[i % len(classes)], level=10 + i % 50,
+                      strength=20, dexterity=20, intelligence=30, hit_points=100 + i % 400,
+                      inventory='The inventory is empty' if i % 3 == 0 else 'Sword, Shield')
+            for i in range(rows)
+        ),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def update_all_characters():
+    # The old caller.update_characters: every row is rewritten, changed or not.
+    # (It needs the output_fields to run at all, F('level') + 3 and F('level') have different types.)
+    integer = PositiveIntegerField()
+    Character.objects.update(
+        level=Case(When(class_name='Mage', then=F('level') + 3), default=F('level'), output_field=integer),
+        intelligence=Case(
+            When(class_name='Mage', then=F('intelligence') - 7), default=F('intelligence'), output_field=integer,
+        ),
+        hit_points=Case(
+            When(class_name='Warrior', then=F('hit_points') / 2), default=F('hit_points'), output_field=integer,
+        ),
+        dexterity=Case(
+            When(class_name='Warrior', then=F('dexterity') + 4), default=F('dexterity'), output_field=integer,
+        ),
+        inventory=Case(
+            When(class_name__in=['Assassin', 'Scout'], then=Value('The inventory is empty')),
+            default=F('inventory'),
+            output_field=TextField(),
+        ),
+    )
+
+
+def characters():
+    return list(Character.objects.order_by('pk').values_list(
+        'class_name', 'level', 'intelligence', 'hit_points', 'dexterity', 'inventory',
+    ))
+
+
+# name: (models to empty, seed, old version, new version, result to compare)
+CASES = {
+    'apply_discount': ([Car], seed_cars, apply_discount_per_row, caller.apply_discount, car_discounts),
+    'increase_room_capacity': (
+        [HotelRoom], seed_rooms, increase_room_capacity_per_row, caller.increase_room_capacity, room_capacities,
+    ),
+    'update_characters': ([Character], seed_characters, update_all_characters, caller.update_characters, characters),
+}
+
+
+def snapshot(models):
+    with connection.cursor() as cursor:
+        for model in models:
+            table = connection.ops.quote_name(model._meta.db_table)
+            snapshot_table = connection.ops.quote_name(f"{model._meta.db_table}_snapshot")
+            cursor.execute(f"DROP TABLE IF EXISTS {snapshot_table}")
+            cursor.execute(f"CREATE TABLE {snapshot_table} AS SELECT * FROM {table}")
+
+
+def restore(models):
+    # Puts the seeded rows back with the same ids, so both versions start from the same data
+    with connection.cursor() as cursor:
+        for model in models:
+            table = connection.ops.quote_name(model._meta.db_table)
+            snapshot_table = connection.ops.quote_name(f"{model._meta.db_table}_snapshot")
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM {snapshot_table}")
+            cursor.execute(f"DROP TABLE {snapshot_table}")
+
+
+def vacuum(models):
+    # Starts every run without dead tuples from the seeding or the restore
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"VACUUM ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+
+def table_stats(models):
+    """
+    Dead tuples and written row versions per table from pg_stat_user_tables (PostgreSQL only).
+    """
+    if connection.vendor != 'postgresql':
+        return None
+    stats = {}
+    with connection.cursor() as cursor:
+        try:
+            # PostgreSQL 15+ only reports the statistics of this backend after a flush
+            cursor.execute("SELECT pg_stat_force_next_flush()")
+        except DatabaseError:
+            pass
+        for model in models:
+            cursor.execute(
+                "SELECT n_dead_tup, n_tup_upd, n_tup_hot_upd FROM pg_stat_user_tables WHERE relname = %s",
+                [model._meta.db_table],
+            )
+            dead, updated, hot_updated = cursor.fetchone()
+            stats[model._meta.db_table] = {'dead_tuples': dead, 'updated': updated, 'hot_updated': hot_updated}
+    return stats
+
+
+def measure(func, models=()):
+    queries = 0
+
+    # Counts instead of logging, the query log only keeps the last 9000 queries
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    before = table_stats(models)
+    start = time.perf_counter()
+    with connection.execute_wrapper(count_queries):
+        func()
+    result = {'seconds': round(time.perf_counter() - start, 4), 'queries': queries}
+
+    after = table_stats(models)
+    if after is not None:
+        result['tables'] = {table: {'before': before[table], 'after': after[table]} for table in after}
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the old versions of caller.py functions against the current ones "
+        "in a throwaway test database and prints the results as JSON. "
+        "On PostgreSQL the dead tuple and update counters of the tables are recorded too."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000000])
+        parser.add_argument('--output', help="JSON file to write the results to (default: stdout)")
+
+    def handle(self, *args, **options):
+        # Never touch the real data, everything runs in the test database
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        results = []
+        try:
+            for name in options['cases']:
+                models, seed, old, new, result = CASES[name]
+                for rows in options['rows']:
+                    for model in models:
+                        model.objects.all().delete()
+                    seed(rows)
+                    snapshot(models)
+                    vacuum(models)
+
+                    old_timing = measure(old, models)
+                    expected = result()
+                    restore(models)
+                    vacuum(models)
+                    new_timing = measure(new, models)
+
+                    results.append({
+                        'case': name,
+                        'rows': rows,
+                        'old': old_timing,
+                        'new': new_timing,
+                        'same_result': result() == expected,
+                    })
+                    self.stderr.write(
+                        f"{name} {rows} rows: old {old_timing['seconds']}s, new {new_timing['seconds']}s"
+                    )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        report = json.dumps({'vendor': connection.vendor, 'results': results}, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(report)
+        else:
+            self.stdout.write(report)
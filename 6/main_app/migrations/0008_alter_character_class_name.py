@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0007_character'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='character',
+            name='class_name',
+            field=models.CharField(choices=[('Mage', 'Mage'), ('Warrior', 'Warrior'), ('Assassin', 'Assassin'), ('Scout', 'Scout')], db_index=True, max_length=20),
+        ),
+    ]
@@ -57,7 +57,7 @@ class Character(models.Model):
         SCOUT = "Scout", "Scout"
 
     name = models.CharField(max_length=100)
-    class_name = models.CharField(max_length=20, choices=ClassName.choices)
+    class_name = models.CharField(max_length=20, choices=ClassName.choices, db_index=True)
     level = models.PositiveIntegerField()
     strength = models.PositiveIntegerField()
     dexterity = models.PositiveIntegerField()
@@ -1,13 +1,18 @@
 import os
 import django
-from django.db.models.functions import ExtractYear
 
 # Set up Django
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "orm_skeleton.settings")
 django.setup()
 
 # Import your models
+from django.db.models import Avg, Count
+
+from main_app.backfill import backfill_links
 from main_app.models import Author, Book, Review
+from main_app.query_cache import cached_filter, invalidate
+from main_app.updates import update_returning
+from main_app.reports import render, stream_rows
 
 # Create and check models
 def add_records_to_database():
@@ -56,35 +61,74 @@ def add_records_to_database():
     Author.objects.bulk_create(authors)
     Book.objects.bulk_create(books)
     Review.objects.bulk_create(reviews)
+    # Resolve the author/book names to foreign keys
+    backfill_links(Author, Book, Review)
+    # bulk_create sends no post_save
+    invalidate(Book)
     return "Records added to tables Authors, Books and Reviews"
 
 # Run and print your queries
 # print(add_records_to_database())
+# For load testing with millions of rows (same --seed, same data):
+# python manage.py seed_database --authors 100000 --books 1000000 --reviews 3000000 --seed 42
 
 def find_books_by_genre_and_language(genre, language):
-    return Book.objects.filter(genre=genre, language=language)
+    # Served from the cache after the first call, see cache_stats() for hits/misses
+    return cached_filter(Book, genre=genre, language=language)
 
 # print(find_books_by_genre_and_language("Romance", "English"))
 # print(find_books_by_genre_and_language("Poetry", "Spanish"))
 # print(find_books_by_genre_and_language("Mystery", "English"))
+# from main_app.query_cache import cache_stats
+# print(cache_stats())
 
 def find_authors_nationalities():
     authors = Author.objects.exclude(nationality__isnull=True)
-    result = ''
-    for a in authors:
-        result += f"\n{a.first_name} {a.last_name} is {a.nationality}"
-    return result
+    return render(stream_rows(authors, ['first_name', 'last_name', 'nationality'], "\n{} {} is {}"))
 # print(find_authors_nationalities())
 
 def order_books_by_year():
     books = Book.objects.order_by('publication_year', 'title')
-    result = ''
-    for b in books:
-        result += f"\n{b.publication_year} year: {b.title} by {b.author}"
-    return result
+    return render(stream_rows(books, ['publication_year', 'title', 'author'], "\n{} year: {} by {}"))
 
 # print(order_books_by_year())
 
+def count_reviews_per_book():
+    """
+    SELECT book.title, COUNT(review.id), AVG(review.rating)
+    FROM books book JOIN reviews review ON review.book_id = book.id
+    GROUP BY book.id
+    ORDER BY COUNT(review.id) DESC, book.title;
+    """
+    books = (
+        Book.objects.filter(reviews__isnull=False)
+        .annotate(review_count=Count('reviews'), average_rating=Avg('reviews__rating'))
+        .order_by('-review_count', 'title')
+    )
+    return render(stream_rows(
+        books,
+        ['title', 'review_count', 'average_rating'],
+        "\n{} has {} reviews with an average rating of {:.2f}",
+    ))
+
+# print(count_reviews_per_book())
+
+def count_reviews_per_author():
+    """
+    SELECT author.first_name, author.last_name, COUNT(review.id)
+    FROM authors author JOIN reviews review ON review.author_id = author.id
+    GROUP BY author.id
+    ORDER BY COUNT(review.id) DESC, author.first_name, author.last_name;
+    """
+    authors = (
+        Author.objects.filter(reviews__isnull=False)
+        .annotate(review_count=Count('reviews'))
+        .order_by('-review_count', 'first_name', 'last_name')
+    )
+    return render(stream_rows(authors, ['first_name', 'last_name', 'review_count'], "\n{} {}: {} reviews"))
+
+# print(count_reviews_per_author())
+
 def delete_review_by_id(rid):
     r = Review.objects.get(id=rid)
     res = f"Review by {r.reviewer_name} was deleted"
@@ -111,7 +155,8 @@ def filter_authors_by_nationalities(nationality): #here judge
 # print(filter_authors_by_nationalities(None))
 
 def filter_authors_by_birth_year(y1, y2):
-    au = Author.objects.annotate(year=ExtractYear('birth_date')).filter(year__range=(y1, y2)).order_by('-birth_date')
+    # birth_date >= 'y1-01-01' AND birth_date < 'y2+1-01-01', can use the birth_date index
+    au = Author.objects.filter(birth_date__year_range=(y1, y2)).order_by('-birth_date')
     r = ''
     for a in au:
         r += f"\n{a.birth_date}: {a.first_name} {a.last_name}"
@@ -127,8 +172,8 @@ def filter_authors_by_birth_year(y1, y2):
 # print(filter_authors_by_birth_year(2000, 2010))
 
 def change_reviewer_name(r_name, n_name):
-    Review.objects.filter(reviewer_name=r_name).update(reviewer_name=n_name)
-    return Review.objects.all()
+    # Only the changed reviews come back, from the UPDATE itself
+    return update_returning(Review.objects.filter(reviewer_name=r_name), {'reviewer_name': n_name})
 
 # print("Change Alice Johnson to A.J.:")
 # print(change_reviewer_name("Alice Johnson", "A.J."))
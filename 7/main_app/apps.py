@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class MainAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'main_app'
+
+    def ready(self):
+        # Registers the custom lookups (year_range)
+        from . import lookups  # noqa: F401
+        from .backfill import link_on_save
+        from .models import Author, Book, Review
+        from .query_cache import invalidate_on_change
+
+        invalidate_on_change(Book)
+        link_on_save(Author, Book, Review)
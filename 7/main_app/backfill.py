@@ -0,0 +1,140 @@
+from typing import Dict, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Q, Value
+from django.db.models.functions import Concat
+from django.db.models.signals import post_save, pre_save
+
+from main_app.query_cache import invalidate
+
+BATCH_SIZE: int = 1000
+
+
+def author_ids(author_model) -> Dict[str, int]:
+    # "First Last" -> id, the lowest id wins for authors with the same name
+    ids = {}
+    for pk, first_name, last_name in author_model.objects.order_by('-pk').values_list('pk', 'first_name', 'last_name'):
+        ids[f"{first_name} {last_name}"] = pk
+    return ids
+
+
+def book_ids(book_model) -> Dict[Tuple[str, str], int]:
+    # (title, author) -> id, the lowest id wins
+    ids = {}
+    for pk, title, author in book_model.objects.order_by('-pk').values_list('pk', 'title', 'author'):
+        ids[(title, author)] = pk
+    return ids
+
+
+def _link_in_chunks(queryset, fields, resolve, batch_size) -> int:
+    """
+    Walks the queryset by pk, resolve(obj) sets the foreign keys, the resolved rows
+    are written with one bulk_update per chunk. Returns the number of linked rows.
+    """
+    linked = 0
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        changed = [obj for obj in chunk if resolve(obj)]
+        if changed:
+            queryset.model.objects.bulk_update(changed, fields)
+            linked += len(changed)
+    return linked
+
+
+def backfill_links(author_model, book_model, review_model, batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Fills Book.author_ref, Review.book and Review.author from the name columns for the rows
+    that are not linked yet. Names are resolved through in-memory name -> id maps, built once.
+    Takes the models as arguments, so data migrations can pass their historical models.
+    """
+    authors = author_ids(author_model)
+    books = book_ids(book_model)
+
+    def link_book(book):
+        book.author_ref_id = authors.get(book.author)
+        return book.author_ref_id is not None
+
+    def link_review(review):
+        before = (review.book_id, review.author_id)
+        review.author_id = review.author_id or authors.get(review.author_name)
+        # Only by title and author, a title alone can belong to another author's book
+        review.book_id = review.book_id or books.get((review.book_title, review.author_name))
+        return (review.book_id, review.author_id) != before
+
+    return {
+        'books': _link_in_chunks(
+            book_model.objects.filter(author_ref__isnull=True).only('pk', 'author'),
+            ['author_ref'], link_book, batch_size,
+        ),
+        'reviews': _link_in_chunks(
+            review_model.objects.filter(Q(book__isnull=True) | Q(author__isnull=True))
+            .only('pk', 'book_title', 'author_name', 'book', 'author'),
+            ['book', 'author'], link_review, batch_size,
+        ),
+    }
+
+
+def find_author(author_model, name: str) -> Optional[int]:
+    # Same rule as author_ids: "First Last", the lowest id wins
+    return (
+        author_model.objects.annotate(full_name=Concat('first_name', Value(' '), 'last_name'))
+        .filter(full_name=name)
+        .order_by('pk')
+        .values_list('pk', flat=True)
+        .first()
+    )
+
+
+def link_on_save(author_model, book_model, review_model) -> None:
+    """
+    Keeps the foreign keys in sync for rows saved one at a time, the same way backfill_links resolves them:
+
+    - a Book or Review saved without its keys gets them from its name columns (a key set by the caller is kept)
+    - a new or renamed Author is linked to the books and reviews that already carry its name
+    - a Book is linked to the unlinked reviews with its title and author
+
+    bulk_create and QuerySet.update send no signals, run backfill_links after those.
+    """
+    def link_book(sender, instance, raw=False, **kwargs):
+        if not raw and instance.author_ref_id is None:
+            instance.author_ref_id = find_author(author_model, instance.author)
+
+    def link_review(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        if instance.author_id is None:
+            instance.author_id = find_author(author_model, instance.author_name)
+        if instance.book_id is None:
+            instance.book_id = (
+                book_model.objects.filter(title=instance.book_title, author=instance.author_name)
+                .order_by('pk')
+                .values_list('pk', flat=True)
+                .first()
+            )
+
+    def link_to_author(sender, instance, raw=False, **kwargs):
+        if raw:
+            return
+        name = f"{instance.first_name} {instance.last_name}"
+        books = book_model.objects.filter(author_ref__isnull=True, author=name).update(author_ref=instance)
+        review_model.objects.filter(author__isnull=True, author_name=name).update(author=instance)
+        if books:
+            # The cached books carry author_ref too
+            transaction.on_commit(lambda: invalidate(book_model), using=kwargs.get('using'))
+
+    def link_to_book(sender, instance, raw=False, **kwargs):
+        if not raw:
+            review_model.objects.filter(
+                book__isnull=True, book_title=instance.title, author_name=instance.author,
+            ).update(book=instance)
+
+    uid = 'backfill_links'
+    pre_save.connect(link_book, sender=book_model, weak=False, dispatch_uid=uid)
+    pre_save.connect(link_review, sender=review_model, weak=False, dispatch_uid=uid)
+    post_save.connect(link_to_author, sender=author_model, weak=False, dispatch_uid=uid)
+    post_save.connect(link_to_book, sender=book_model, weak=False, dispatch_uid=uid)
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.db.models import DateField, Lookup
+
+
+@DateField.register_lookup
+class YearRange(Lookup):
+    """
+    birth_date__year_range=(1980, 2000) keeps the rows with a year from 1980 to 2000 (both included).
+
+    Unlike annotate(year=ExtractYear('birth_date')).filter(year__range=...), the column is compared
+    as it is, so an index on it can be used:
+
+    birth_date >= '1980-01-01' AND birth_date < '2001-01-01'
+    """
+    lookup_name = 'year_range'
+
+    def get_prep_lookup(self):
+        first_year, last_year = self.rhs
+        return date(int(first_year), 1, 1), date(int(last_year) + 1, 1, 1)
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        start, end = self.rhs
+        field = self.lhs.output_field
+        params = [
+            field.get_db_prep_value(start, connection, prepared=False),
+            field.get_db_prep_value(end, connection, prepared=False),
+        ]
+        return f"{lhs} >= %s AND {lhs} < %s", lhs_params + lhs_params + params
@@ -0,0 +1,86 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main_app.models import Author, Book, Review
+from main_app.query_cache import invalidate
+from main_app.seeding import BATCH_SIZE, DEFAULT_GENRES, DEFAULT_LANGUAGES, DEFAULT_RATINGS, SeedConfig, seed
+
+
+def parse_weights(value):
+    """ "Mystery=3,Fantasy=2,none=1" -> {'Mystery': 3.0, 'Fantasy': 2.0, None: 1.0} """
+    weights = {}
+    for item in value.split(','):
+        name, _, weight = item.rpartition('=')
+        if not name:
+            raise CommandError(f"Expected name=weight, got {item!r}")
+        weights[None if name.lower() == 'none' else name] = float(weight)
+    return weights
+
+
+class Command(BaseCommand):
+    help = "Generates a reproducible load-testing data set of authors, books and reviews."
+
+    def add_arguments(self, parser):
+        defaults = SeedConfig()
+        parser.add_argument('--authors', type=int, default=defaults.authors)
+        parser.add_argument('--books', type=int, default=defaults.books)
+        parser.add_argument('--reviews', type=int, default=defaults.reviews)
+        parser.add_argument('--seed', type=int, default=defaults.seed, help="the same seed gives the same rows")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--null-nationality', type=float, default=defaults.null_nationality,
+                            help="share of authors without a nationality")
+        parser.add_argument('--author-skew', type=float, default=defaults.author_skew,
+                            help="above 1 gives most books to few authors")
+        parser.add_argument('--book-skew', type=float, default=defaults.book_skew,
+                            help="above 1 gives most reviews to few books")
+        parser.add_argument('--ratings', default=','.join(str(w) for w in DEFAULT_RATINGS),
+                            help="weights of the ratings 1 to 5, e.g. 5,8,17,35,35")
+        parser.add_argument('--genres', type=parse_weights, default=DEFAULT_GENRES,
+                            help="genre weights, e.g. Mystery=3,Fantasy=2,none=1")
+        parser.add_argument('--languages', type=parse_weights, default=DEFAULT_LANGUAGES,
+                            help="language weights, e.g. English=6,Spanish=1,none=1")
+        parser.add_argument('--flush', action='store_true', help="delete all authors, books and reviews first")
+
+    def handle(self, *args, **options):
+        ratings = tuple(float(w) for w in options['ratings'].split(','))
+        if len(ratings) != 5:
+            raise CommandError("--ratings needs 5 weights, for the ratings 1 to 5")
+        config = SeedConfig(
+            authors=options['authors'],
+            books=options['books'],
+            reviews=options['reviews'],
+            seed=options['seed'],
+            null_nationality=options['null_nationality'],
+            author_skew=options['author_skew'],
+            book_skew=options['book_skew'],
+            genres=options['genres'],
+            languages=options['languages'],
+            ratings=ratings,
+        )
+
+        if options['flush']:
+            Review.objects.all().delete()
+            Book.objects.all().delete()
+            Author.objects.all().delete()
+
+        start = time.perf_counter()
+
+        def progress(model_name, done):
+            print(f"\r{model_name}: {done} rows, {time.perf_counter() - start:.1f}s", end='', file=sys.stderr, flush=True)
+
+        try:
+            counts = seed(config, options['batch_size'], progress)
+        except ValueError as e:
+            raise CommandError(e)
+        print(file=sys.stderr)
+        # The rows are written with COPY/INSERT, no post_save reaches the query cache
+        invalidate(Book)
+
+        seconds = time.perf_counter() - start
+        total = sum(counts.values())
+        self.stdout.write(
+            f"Seeded {counts['authors']} authors, {counts['books']} books and {counts['reviews']} reviews "
+            f"in {seconds:.1f}s ({total / seconds if seconds else total:.0f} rows/s)"
+        )
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='author',
+            name='birth_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0002_alter_author_birth_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='author_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='books', to='main_app.author'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='author',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviews', to='main_app.author'),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='book',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviews', to='main_app.book'),
+        ),
+    ]
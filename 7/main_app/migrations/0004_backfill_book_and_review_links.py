@@ -0,0 +1,27 @@
+from django.db import migrations
+
+from main_app.backfill import backfill_links
+
+
+def link_books_and_reviews(apps, schema_editor):
+    backfill_links(
+        apps.get_model('main_app', 'Author'),
+        apps.get_model('main_app', 'Book'),
+        apps.get_model('main_app', 'Review'),
+    )
+
+
+def unlink_books_and_reviews(apps, schema_editor):
+    apps.get_model('main_app', 'Book').objects.update(author_ref=None)
+    apps.get_model('main_app', 'Review').objects.update(book=None, author=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0003_book_author_ref_review_author_review_book'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_books_and_reviews, reverse_code=unlink_books_and_reviews)
+    ]
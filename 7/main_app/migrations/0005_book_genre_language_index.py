@@ -0,0 +1,17 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main_app', '0004_backfill_book_and_review_links'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['genre', 'language'], name='main_app_bo_genre_5ffa64_idx'),
+        ),
+    ]
@@ -3,7 +3,7 @@ from django.db import models
 class Author(models.Model):
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
-    birth_date = models.DateField(null=True, blank=True)
+    birth_date = models.DateField(null=True, blank=True, db_index=True)
     nationality = models.CharField(max_length=50, null=True, blank=True)
     biography = models.TextField(null=True, blank=True)
 
@@ -13,11 +13,17 @@ class Author(models.Model):
 class Book(models.Model):
     title = models.CharField(max_length=100)
     author = models.CharField(max_length=100)
+    # author above resolved to an Author row, None when the author is not in the table
+    author_ref = models.ForeignKey(Author, on_delete=models.SET_NULL, null=True, blank=True, related_name='books')
     publication_year = models.IntegerField()
     genre = models.CharField(max_length=50, null=True, blank=True)
     language = models.CharField(max_length=50, null=True, blank=True)
     page_count = models.PositiveIntegerField(null=True, blank=True)
 
+    class Meta:
+        # find_books_by_genre_and_language filters on both
+        indexes = [models.Index(fields=['genre', 'language'])]
+
     def __str__(self):
         return f"{self.title} by {self.author}"
 
@@ -25,6 +31,9 @@ class Review(models.Model):
     reviewer_name = models.CharField(max_length=100)
     book_title = models.CharField(max_length=100)
     author_name = models.CharField(max_length=100)
+    # book_title and author_name resolved to rows, so reviews join on integer keys
+    book = models.ForeignKey(Book, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviews')
+    author = models.ForeignKey(Author, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviews')
     rating = models.PositiveIntegerField()
     comment = models.TextField(null=True, blank=True)
     created_on = models.DateTimeField(auto_now_add=True, editable=False)
@@ -0,0 +1,99 @@
+import hashlib
+import json
+from typing import Dict
+
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+
+CACHE_ALIAS = 'default'
+TIMEOUT: int = 300
+
+# Per process counters, see cache_stats()
+_stats: Dict[str, int] = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(model) -> str:
+    return f"query_cache:{model._meta.label_lower}:version"
+
+
+def _version(model) -> int:
+    # Every key of a model contains its version, bumping it orphans all the cached results at once
+    # (locmem and file caches can't delete by prefix), the orphans expire with TIMEOUT
+    version = _cache().get(_version_key(model))
+    if version is None:
+        version = 1
+        _cache().add(_version_key(model), version, None)
+    return version
+
+
+def cache_key(model, params: dict) -> str:
+    digest = hashlib.md5(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+    return f"query_cache:{model._meta.label_lower}:{_version(model)}:{digest}"
+
+
+def cached_filter(model, **params) -> QuerySet:
+    """
+    model.objects.filter(**params) with the rows kept in Django's cache.
+
+    A hit returns the instances without a query, a miss runs
+
+    SELECT * FROM table WHERE field = param AND ...;
+
+    and stores the rows as tuples. The result is the QuerySet with its result cache already filled,
+    so iterating, len(), count(), exists() and printing use the cached rows,
+    while chaining (.filter(), .order_by(), ...) builds a new query like any QuerySet.
+    """
+    key = cache_key(model, params)
+    queryset = model.objects.filter(**params)
+    fields = [f.attname for f in model._meta.concrete_fields]
+    rows = _cache().get(key)
+    if rows is None:
+        _stats['misses'] += 1
+        rows = list(queryset.values_list(*fields))
+        _cache().set(key, rows, TIMEOUT)
+    else:
+        _stats['hits'] += 1
+    # from_db marks them as loaded from the database, like the instances of a real filter()
+    queryset._result_cache = [model.from_db(queryset.db, fields, row) for row in rows]
+    queryset._prefetch_done = True
+    return queryset
+
+
+def invalidate(model) -> None:
+    """
+    Drops every cached result of the model. Connected to post_save/post_delete by invalidate_on_change,
+    bulk_create, bulk_update and QuerySet.update send no signals, so call it after those.
+    """
+    _stats['invalidations'] += 1
+    try:
+        _cache().incr(_version_key(model))
+    except ValueError:
+        # Nothing cached for the model yet
+        pass
+
+
+def invalidate_on_change(model) -> None:
+    uid = f"query_cache:{model._meta.label_lower}"
+    post_save.connect(_invalidate, sender=model, dispatch_uid=uid)
+    post_delete.connect(_invalidate, sender=model, dispatch_uid=uid)
+
+
+def _invalidate(sender, using=None, **kwargs) -> None:
+    # After the commit, a reader in between would cache the old rows under the new version
+    transaction.on_commit(lambda: invalidate(sender), using=using)
+
+
+def cache_stats() -> dict:
+    lookups = _stats['hits'] + _stats['misses']
+    return {**_stats, 'hit_rate': round(_stats['hits'] / lookups, 3) if lookups else 0.0}
+
+
+def reset_cache_stats() -> None:
+    for name in _stats:
+        _stats[name] = 0
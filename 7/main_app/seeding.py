@@ -0,0 +1,264 @@
+import csv
+import io
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.core.management.color import no_style
+from django.db import connection, transaction
+
+from main_app.models import Author, Book, Review
+
+BATCH_SIZE: int = 50000
+
+FIRST_NAMES = (
+    'John', 'Jane', 'Michael', 'Emily', 'David', 'Sarah', 'Paulo', 'Maria', 'Alice', 'Harper',
+    'James', 'Olivia', 'Robert', 'Sophia', 'William', 'Isabella', 'Daniel', 'Mia', 'Thomas', 'Elena',
+    'Ivan', 'Yoana', 'Kenji', 'Aiko', 'Omar', 'Fatima', 'Lucas', 'Chloe', 'Mateo', 'Nadia',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Brown', 'Coelho', 'Austen', 'Lee', 'Garcia', 'Roberts', 'Wilson', 'Taylor',
+    'Martin', 'Petrov', 'Ivanova', 'Tanaka', 'Suzuki', 'Haddad', 'Rossi', 'Muller', 'Dubois', 'Novak',
+    'Silva', 'Kowalski', 'Jensen', 'OConnor', 'Schmidt', 'Costa', 'Nielsen', 'Popescu', 'Horvat', 'Moreau',
+)
+NATIONALITIES = (
+    'American', 'British', 'Brazilian', 'Spanish', 'Bulgarian', 'Japanese', 'French', 'German',
+    'Italian', 'Polish', 'Irish', 'Danish', 'Romanian', 'Croatian', 'Lebanese', 'Portuguese',
+)
+TITLE_ADJECTIVES = (
+    'Lost', 'Red', 'Silent', 'Hidden', 'Last', 'Golden', 'Broken', 'Secret', 'Endless', 'Forgotten',
+    'Dark', 'Bright', 'Wild', 'Quiet', 'Burning', 'Frozen', 'Distant', 'Empty', 'Sacred', 'Stolen',
+)
+TITLE_NOUNS = (
+    'Key', 'Planet', 'Kingdom', 'Mansion', 'River', 'Garden', 'Letter', 'Empire', 'Voyage', 'Heart',
+    'Mirror', 'City', 'Forest', 'Island', 'Promise', 'Shadow', 'Crown', 'Storm', 'Road', 'Song',
+)
+COMMENTS = (
+    'Could not put it down.', 'A bit slow in the middle.', 'Beautifully written.', 'Not my cup of tea.',
+    'The ending surprised me.', 'Great characters.', 'Too long.', 'A classic.', None, None,
+)
+
+DEFAULT_GENRES: Dict[Optional[str], float] = {
+    'Fiction': 20, 'Mystery': 15, 'Romance': 15, 'Fantasy': 12, 'Science Fiction': 10,
+    'Poetry': 5, 'History': 8, 'Biography': 5, None: 10,
+}
+DEFAULT_LANGUAGES: Dict[Optional[str], float] = {
+    'English': 60, 'Spanish': 10, 'Portuguese': 5, 'French': 7, 'German': 6, 'Bulgarian': 2, None: 10,
+}
+# Weights of the ratings 1 to 5, most reviews are positive
+DEFAULT_RATINGS: Tuple[float, ...] = (5, 8, 17, 35, 35)
+
+REVIEW_EPOCH = datetime(2015, 1, 1, tzinfo=timezone.utc)
+MASK64 = (1 << 64) - 1
+
+
+def splitmix64(x: int) -> int:
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+class WeightedChoice:
+    """Maps a number in [0, 1) to one of the values, proportionally to the weights."""
+
+    def __init__(self, weights: Dict):
+        self.values = list(weights)
+        total = sum(weights.values())
+        self.bounds = [w / total for w in accumulate(weights.values())]
+
+    def __call__(self, u: float):
+        return self.values[min(bisect_right(self.bounds, u), len(self.values) - 1)]
+
+
+@dataclass
+class SeedConfig:
+    """
+    How much to generate and how it is distributed.
+
+    author_skew/book_skew > 1 concentrate books on few prolific authors and reviews on few popular books
+    (index = n * u ** skew), 1 spreads them evenly.
+    """
+    authors: int = 100000
+    books: int = 1000000
+    reviews: int = 3000000
+    seed: int = 42
+    null_nationality: float = 0.15
+    null_biography: float = 0.5
+    null_page_count: float = 0.1
+    author_skew: float = 2.0
+    book_skew: float = 3.0
+    genres: Dict[Optional[str], float] = field(default_factory=lambda: dict(DEFAULT_GENRES))
+    languages: Dict[Optional[str], float] = field(default_factory=lambda: dict(DEFAULT_LANGUAGES))
+    ratings: Sequence[float] = DEFAULT_RATINGS
+
+
+class RowGenerator:
+    """
+    Deterministic rows: every value is a hash of (seed, table, row index, column),
+    so any row can be recomputed on its own (a review reads the title and author of its book
+    without keeping millions of books in memory) and the same seed always gives the same data.
+    """
+
+    def __init__(self, config: SeedConfig, first_ids: Dict[str, int]):
+        self.config = config
+        self.first_ids = first_ids
+        self.genre = WeightedChoice(config.genres)
+        self.language = WeightedChoice(config.languages)
+        self.rating = WeightedChoice(dict(zip(range(1, 6), config.ratings)))
+        # One key per table, so a value costs a single splitmix64 round
+        self.table_keys = {table: splitmix64(splitmix64(config.seed) ^ table) for table in (1, 2, 3)}
+
+    def uniform(self, table: int, i: int, column: int) -> float:
+        h = splitmix64(self.table_keys[table] ^ (i * 64 + column))
+        return (h >> 11) / (1 << 53)
+
+    def pick(self, values: Sequence, table: int, i: int, column: int):
+        return values[int(self.uniform(table, i, column) * len(values))]
+
+    def author(self, i: int) -> tuple:
+        u = self.uniform
+        first_name = self.pick(FIRST_NAMES, 1, i, 0)
+        last_name = self.pick(LAST_NAMES, 1, i, 1)
+        birth_date = date(1920, 1, 1) + timedelta(days=int(u(1, i, 2) * 80 * 365))
+        nationality = None if u(1, i, 3) < self.config.null_nationality else self.pick(NATIONALITIES, 1, i, 4)
+        biography = None
+        if u(1, i, 5) >= self.config.null_biography:
+            biography = f"{first_name} {last_name} was born in {birth_date.year} and writes in their spare time."
+        return (self.first_ids['author'] + i, first_name, last_name, birth_date, nationality, biography)
+
+    def book_author(self, i: int) -> int:
+        return int(self.config.authors * self.uniform(2, i, 0) ** self.config.author_skew)
+
+    def book(self, i: int) -> tuple:
+        u = self.uniform
+        author_index = self.book_author(i)
+        _, first_name, last_name, birth_date, _, _ = self.author(author_index)
+        adjective, noun = self.pick(TITLE_ADJECTIVES, 2, i, 1), self.pick(TITLE_NOUNS, 2, i, 2)
+        if u(2, i, 8) < 0.5:
+            title = f"The {adjective} {noun}"
+        else:
+            title = f"The {noun} of the {adjective} {self.pick(TITLE_NOUNS, 2, i, 9)}"
+        publication_year = min(birth_date.year + 20 + int(u(2, i, 3) * 50), 2024)
+        page_count = None if u(2, i, 4) < self.config.null_page_count else 80 + int(u(2, i, 5) * 900)
+        return (
+            self.first_ids['book'] + i, title, f"{first_name} {last_name}", self.first_ids['author'] + author_index,
+            publication_year, self.genre(u(2, i, 6)), self.language(u(2, i, 7)), page_count,
+        )
+
+    def review(self, i: int) -> tuple:
+        u = self.uniform
+        book_index = int(self.config.books * u(3, i, 0) ** self.config.book_skew)
+        book_id, title, author_name, author_id = self.book(book_index)[:4]
+        reviewer_name = f"{self.pick(FIRST_NAMES, 3, i, 1)} {self.pick(LAST_NAMES, 3, i, 2)}"
+        created_on = REVIEW_EPOCH + timedelta(seconds=int(u(3, i, 3) * 10 * 365 * 86400))
+        return (
+            self.first_ids['review'] + i, reviewer_name, title, author_name, book_id, author_id,
+            self.rating(u(3, i, 4)), self.pick(COMMENTS, 3, i, 5), created_on,
+        )
+
+
+AUTHOR_FIELDS = ('id', 'first_name', 'last_name', 'birth_date', 'nationality', 'biography')
+BOOK_FIELDS = ('id', 'title', 'author', 'author_ref', 'publication_year', 'genre', 'language', 'page_count')
+REVIEW_FIELDS = ('id', 'reviewer_name', 'book_title', 'author_name', 'book', 'author', 'rating', 'comment', 'created_on')
+
+
+def _copy(cursor, sql: str, rows: List[tuple]) -> None:
+    buffer = io.StringIO()
+    # In CSV mode COPY reads an unquoted empty value as NULL, which is what csv writes for None
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+
+    raw = cursor.cursor
+    if hasattr(raw, 'copy_expert'):  # psycopg2
+        raw.copy_expert(sql, buffer)
+    else:  # psycopg 3
+        with raw.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+def _insert(cursor, model, fields: Sequence[str], rows: List[tuple]) -> None:
+    # Fallback for databases without COPY, the values go through the field's own conversion
+    db = cursor.db
+    model_fields = [model._meta.get_field(name) for name in fields]
+    # Only dates and datetimes need converting, plain ids, numbers and strings go as they are
+    prepare = [
+        i for i, f in enumerate(model_fields)
+        if f.get_internal_type() in ('DateField', 'DateTimeField')
+    ]
+    rows = [list(row) for row in rows]
+    for row in rows:
+        for i in prepare:
+            row[i] = model_fields[i].get_db_prep_save(row[i], db)
+    columns = ', '.join(db.ops.quote_name(f.column) for f in model_fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    cursor.executemany(f"INSERT INTO {model._meta.db_table} ({columns}) VALUES ({placeholders})", rows)
+
+
+def write_rows(model, fields: Sequence[str], rows: Iterator[tuple], batch_size: int = BATCH_SIZE,
+               progress: Optional[Callable[[str, int], None]] = None) -> int:
+    """
+    Writes the rows batch_size at a time, with
+
+    COPY table (columns) FROM STDIN WITH (FORMAT csv);
+
+    on PostgreSQL and a multi-row INSERT elsewhere. Returns the number of rows.
+    """
+    columns = ', '.join(model._meta.get_field(name).column for name in fields)
+    sql = f"COPY {model._meta.db_table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    written = 0
+    with connection.cursor() as cursor:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                written += _write_batch(cursor, sql, model, fields, batch)
+                batch = []
+                if progress:
+                    progress(model.__name__, written)
+        if batch:
+            written += _write_batch(cursor, sql, model, fields, batch)
+            if progress:
+                progress(model.__name__, written)
+    return written
+
+
+def _write_batch(cursor, sql, model, fields, batch) -> int:
+    if connection.vendor == 'postgresql':
+        _copy(cursor, sql, batch)
+    else:
+        _insert(cursor, model, fields, batch)
+    return len(batch)
+
+
+def next_id(model) -> int:
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first()
+    return (last or 0) + 1
+
+
+def seed(config: SeedConfig, batch_size: int = BATCH_SIZE,
+         progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+    """
+    Generates config.authors authors, config.books books and config.reviews reviews
+    (foreign keys filled in) after the existing rows, in one transaction.
+    The ids are assigned here so books and reviews can point at rows of the same run,
+    the id sequences are moved past them at the end.
+    """
+    if config.books and not config.authors or config.reviews and not config.books:
+        raise ValueError("books need at least one author and reviews at least one book")
+
+    first_ids = {'author': next_id(Author), 'book': next_id(Book), 'review': next_id(Review)}
+    generator = RowGenerator(config, first_ids)
+
+    with transaction.atomic():
+        counts = {
+            'authors': write_rows(Author, AUTHOR_FIELDS, map(generator.author, range(config.authors)), batch_size, progress),
+            'books': write_rows(Book, BOOK_FIELDS, map(generator.book, range(config.books)), batch_size, progress),
+            'reviews': write_rows(Review, REVIEW_FIELDS, map(generator.review, range(config.reviews)), batch_size, progress),
+        }
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Author, Book, Review]):
+                cursor.execute(sql)
+    return counts
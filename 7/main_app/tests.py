@@ -0,0 +1,230 @@
+from datetime import date
+from unittest import skipUnless
+
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import F, QuerySet, Value
+from django.db.models.functions import Concat
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from main_app.backfill import backfill_links
+from main_app.models import Author, Book, Review
+from main_app.query_cache import CACHE_ALIAS, cache_stats, cached_filter, reset_cache_stats
+from main_app.seeding import SeedConfig, seed
+from main_app.updates import update_returning
+
+
+class YearRangeLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Author.objects.bulk_create([
+            Author(first_name="Old", last_name="Author", birth_date=date(1979, 12, 31)),
+            Author(first_name="First", last_name="Author", birth_date=date(1980, 1, 1)),
+            Author(first_name="Last", last_name="Author", birth_date=date(2000, 12, 31)),
+            Author(first_name="Young", last_name="Author", birth_date=date(2001, 1, 1)),
+            Author(first_name="No", last_name="Date"),
+        ])
+
+    def test_year_range_includes_both_years(self):
+        authors = Author.objects.filter(birth_date__year_range=(1980, 2000)).order_by('birth_date')
+        self.assertEqual([a.first_name for a in authors], ["First", "Last"])
+
+    def test_year_range_compares_the_column_directly(self):
+        sql = str(Author.objects.filter(birth_date__year_range=(1980, 2000)).query)
+        self.assertNotIn('EXTRACT', sql.upper())
+        self.assertNotIn('DJANGO_DATE_EXTRACT', sql.upper())
+
+    @skipUnless(connection.vendor == 'postgresql', "EXPLAIN output is PostgreSQL specific")
+    def test_year_range_uses_birth_date_index(self):
+        with connection.cursor() as cursor:
+            # The test table is tiny, without this the planner would always pick a sequential scan
+            cursor.execute("SET enable_seqscan = off")
+        plan = Author.objects.filter(birth_date__year_range=(1980, 2000)).explain()
+        self.assertIn('Index', plan)
+        self.assertNotIn('Seq Scan', plan)
+
+
+class BookQueryCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Book.objects.bulk_create([
+            Book(title="Love in Paris", author="Sarah Lee", publication_year=2012, genre="Romance", language="English"),
+            Book(title="Poems of the Heart", author="Maria Garcia", publication_year=2008, genre="Poetry", language="Spanish"),
+        ])
+
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        reset_cache_stats()
+
+    def test_second_call_is_served_from_the_cache(self):
+        first = cached_filter(Book, genre="Romance", language="English")
+        with self.assertNumQueries(0):
+            second = cached_filter(Book, genre="Romance", language="English")
+        self.assertEqual([b.title for b in second], [b.title for b in first])
+        self.assertEqual(cache_stats()['hits'], 1)
+        self.assertEqual(cache_stats()['misses'], 1)
+
+    def test_result_keeps_the_queryset_interface(self):
+        cached_filter(Book, genre="Romance", language="English")
+        with self.assertNumQueries(0):
+            books = cached_filter(Book, genre="Romance", language="English")
+            self.assertIsInstance(books, QuerySet)
+            self.assertEqual(books.count(), 1)
+            self.assertTrue(books.exists())
+            self.assertIn("Love in Paris", repr(books))
+        # Chaining runs a real query
+        with self.assertNumQueries(1):
+            self.assertEqual(books.filter(publication_year__gt=2020).count(), 0)
+
+    def test_cached_instances_look_loaded_from_the_database(self):
+        cached_filter(Book, genre="Romance", language="English")
+        book = cached_filter(Book, genre="Romance", language="English")[0]
+        self.assertFalse(book._state.adding)
+        self.assertEqual(book._state.db, 'default')
+        self.assertEqual(book, Book.objects.get(title="Love in Paris"))
+
+    def test_save_and_delete_invalidate_after_commit(self):
+        cached_filter(Book, genre="Poetry", language="Spanish")
+        with self.captureOnCommitCallbacks() as callbacks:
+            book = Book.objects.create(title="Soulful Verses", author="Maria Garcia", publication_year=2015, genre="Poetry", language="Spanish")
+        # Not committed yet, the cached rows are still served
+        self.assertEqual(len(cached_filter(Book, genre="Poetry", language="Spanish")), 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(cached_filter(Book, genre="Poetry", language="Spanish")), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            book.delete()
+        self.assertEqual(len(cached_filter(Book, genre="Poetry", language="Spanish")), 1)
+        self.assertEqual(cache_stats()['misses'], 3)
+
+
+class UpdateReturningTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Review.objects.bulk_create([
+            Review(reviewer_name="Alice Johnson", book_title="Love in Paris", author_name="Sarah Lee", rating=4),
+            Review(reviewer_name="Bob Wilson", book_title="Love in Paris", author_name="Sarah Lee", rating=2),
+            Review(reviewer_name="Alice Johnson", book_title="1984", author_name="Anonymous Writer", rating=5),
+        ])
+
+    def test_returns_only_the_updated_rows_in_one_query(self):
+        with self.assertNumQueries(1):
+            reviews = update_returning(Review.objects.filter(reviewer_name="Alice Johnson"), {'reviewer_name': "A.J."})
+        self.assertEqual(sorted(r.book_title for r in reviews), ["1984", "Love in Paris"])
+        self.assertTrue(all(r.reviewer_name == "A.J." for r in reviews))
+        self.assertIsNotNone(reviews[0].created_on.year)
+        self.assertEqual(Review.objects.filter(reviewer_name="A.J.").count(), 2)
+
+    def test_fields_and_count(self):
+        reviews = update_returning(Review.objects.filter(rating__lt=3), {'rating': 3}, fields=['rating'])
+        self.assertEqual([r.rating for r in reviews], [3])
+        self.assertEqual(reviews[0].get_deferred_fields(), {f.attname for f in Review._meta.concrete_fields} - {'id', 'rating'})
+        self.assertEqual(update_returning(Review.objects.all(), {'rating': 1}, fields=[]), 3)
+
+    def test_sliced_queryset_is_refused(self):
+        with self.assertRaises(TypeError):
+            update_returning(Review.objects.all()[:2], {'rating': 1})
+        self.assertFalse(Review.objects.filter(rating=1).exists())
+
+    def test_filter_over_a_join(self):
+        book = Book.objects.create(title="1984", author="Anonymous Writer", publication_year=2021)
+        Review.objects.filter(book_title="1984").update(book=book)
+        with CaptureQueriesContext(connection) as ctx:
+            reviews = update_returning(Review.objects.filter(book__title="1984"), {'rating': 2})
+        self.assertEqual([(r.book_title, r.rating) for r in reviews], [("1984", 2)])
+        update_sql = ctx.captured_queries[-1]['sql']
+        self.assertEqual(update_sql.count(' IN (SELECT'), 1)
+
+    @override_settings(DATABASE_ROUTERS=['main_app.tests.ReplicaRouter'])
+    def test_runs_on_the_write_database(self):
+        # The read alias doesn't exist, reading from it would fail
+        reviews = update_returning(Review.objects.filter(rating=5), {'rating': 4})
+        self.assertEqual([r._state.db for r in reviews], ['default'])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return 'replica'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+
+class SeedingTests(TestCase):
+    def test_same_seed_gives_the_same_rows(self):
+        config = SeedConfig(authors=20, books=50, reviews=100, seed=7)
+        seed(config, batch_size=30)
+        first = list(Review.objects.order_by('pk').values_list('reviewer_name', 'book_title', 'rating', 'created_on'))
+        Review.objects.all().delete()
+        Book.objects.all().delete()
+        Author.objects.all().delete()
+        counts = seed(config, batch_size=30)
+        second = list(Review.objects.order_by('pk').values_list('reviewer_name', 'book_title', 'rating', 'created_on'))
+        self.assertEqual(counts, {'authors': 20, 'books': 50, 'reviews': 100})
+        self.assertEqual(first, second)
+
+    def test_foreign_keys_match_the_names(self):
+        seed(SeedConfig(authors=20, books=50, reviews=100))
+        self.assertFalse(Review.objects.exclude(book__title=F('book_title')).exists())
+        full_name = Concat('author_ref__first_name', Value(' '), 'author_ref__last_name')
+        self.assertFalse(Book.objects.annotate(full_name=full_name).exclude(author=F('full_name')).exists())
+
+
+class BackfillLinksTests(TestCase):
+    def test_links_by_name_and_title_with_author(self):
+        smith = Author.objects.create(first_name="John", last_name="Smith")
+        lee = Author.objects.create(first_name="Sarah", last_name="Lee")
+        Book.objects.bulk_create([
+            Book(title="Love in Paris", author="Sarah Lee", publication_year=2012),
+            Book(title="Love in Paris", author="John Smith", publication_year=2015),
+            Book(title="Orphan", author="Nobody Known", publication_year=2000),
+        ])
+        Review.objects.bulk_create([
+            Review(reviewer_name="A", book_title="Love in Paris", author_name="John Smith", rating=5),
+            Review(reviewer_name="B", book_title="Love in Paris", author_name="Sarah Lee", rating=3),
+            # Same title as Sarah Lee's book, but no book of this author has it
+            Review(reviewer_name="C", book_title="Love in Paris", author_name="Unknown Writer", rating=1),
+        ])
+
+        self.assertEqual(backfill_links(Author, Book, Review, batch_size=2), {'books': 2, 'reviews': 2})
+
+        paris_smith = Book.objects.get(title="Love in Paris", author="John Smith")
+        self.assertEqual(paris_smith.author_ref, smith)
+        self.assertEqual(Book.objects.get(title="Love in Paris", author="Sarah Lee").author_ref, lee)
+        self.assertIsNone(Book.objects.get(title="Orphan").author_ref)
+
+        a, b, c = Review.objects.order_by('reviewer_name')
+        self.assertEqual((a.book, a.author), (paris_smith, smith))
+        self.assertEqual(b.book.author_ref, b.author)
+        self.assertEqual((c.book, c.author), (None, None))
+
+        # Nothing left to link
+        self.assertEqual(backfill_links(Author, Book, Review), {'books': 0, 'reviews': 0})
+
+
+class LinkOnSaveTests(TestCase):
+    def test_new_rows_are_linked(self):
+        lee = Author.objects.create(first_name="Sarah", last_name="Lee")
+        book = Book.objects.create(title="Love in Paris", author="Sarah Lee", publication_year=2012)
+        review = Review.objects.create(reviewer_name="A", book_title="Love in Paris", author_name="Sarah Lee", rating=4)
+        self.assertEqual(book.author_ref, lee)
+        self.assertEqual((review.book, review.author), (book, lee))
+
+    def test_rows_saved_before_their_author_or_book_are_linked_later(self):
+        review = Review.objects.create(reviewer_name="A", book_title="Soulful Verses", author_name="Maria Garcia", rating=4)
+        self.assertEqual((review.book_id, review.author_id), (None, None))
+
+        book = Book.objects.create(title="Soulful Verses", author="Maria Garcia", publication_year=2015)
+        garcia = Author.objects.create(first_name="Maria", last_name="Garcia")
+
+        book.refresh_from_db()
+        review.refresh_from_db()
+        self.assertEqual(book.author_ref, garcia)
+        self.assertEqual((review.book, review.author), (book, garcia))
+
+    def test_explicit_key_is_kept(self):
+        Author.objects.create(first_name="Sarah", last_name="Lee")
+        other = Author.objects.create(first_name="Pen", last_name="Name")
+        book = Book.objects.create(title="Love in Paris", author="Sarah Lee", publication_year=2012, author_ref=other)
+        self.assertEqual(book.author_ref, other)
@@ -0,0 +1,68 @@
+from typing import List, Optional, Sequence, Union
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, router
+from django.db.models.sql import UpdateQuery
+
+
+def update_returning(queryset, values: dict, fields: Optional[Sequence[str]] = None) -> Union[List, int]:
+    """
+    Runs queryset.update(**values) and gets the changed rows back in the same round trip:
+
+    UPDATE table SET field = value WHERE ... RETURNING id, ...;
+
+    Returns the updated instances (only fields are loaded when given, the rest is deferred),
+    or just the number of updated rows when fields is an empty sequence.
+    Needs RETURNING support (PostgreSQL, SQLite 3.35+).
+    """
+    if queryset.query.is_sliced:
+        raise TypeError("Cannot update a query once a slice has been taken.")
+    if fields is not None and not fields:
+        return queryset.update(**values)
+
+    model = queryset.model
+    # Like QuerySet.update, the write alias (queryset.db is the read one)
+    db = queryset._db or router.db_for_write(model)
+    connection = connections[db]
+    if connection.vendor not in ('postgresql', 'sqlite') or not connection.features.can_return_rows_from_bulk_insert:
+        raise RuntimeError(f"update_returning needs UPDATE ... RETURNING, not supported by {connection.vendor}")
+
+    if fields is None:
+        attnames = [f.attname for f in model._meta.concrete_fields]
+    else:
+        attnames = [model._meta.get_field(name).attname for name in fields]
+        if model._meta.pk.attname not in attnames:
+            attnames.insert(0, model._meta.pk.attname)
+    model_fields = [model._meta.get_field(name) for name in attnames]
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(values)
+    compiler = query.get_compiler(db)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        # e.g. pk__in=[], nothing to update
+        return []
+    if not sql:
+        return []
+    returning = ', '.join(connection.ops.quote_name(field.column) for field in model_fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} RETURNING {returning}", params)
+        rows = cursor.fetchall()
+
+    # The raw rows skip the usual conversion (e.g. SQLite returns datetimes as text)
+    converters = []
+    for i, field in enumerate(model_fields):
+        col = field.get_col(model._meta.db_table)
+        functions = connection.ops.get_db_converters(col) + field.get_db_converters(connection)
+        if functions:
+            converters.append((i, functions, col))
+    instances = []
+    for row in rows:
+        row = list(row)
+        for i, functions, col in converters:
+            for convert in functions:
+                row[i] = convert(row[i], col, connection)
+        instances.append(model.from_db(db, attnames, row))
+    return instances
@@ -94,6 +94,15 @@ DATABASES = {
 }
 
 
+# Cache for main_app.query_cache, use FileBasedCache to share it between processes
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "orm_training_7",
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
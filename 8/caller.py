@@ -9,7 +9,9 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "orm_skeleton.settings")
 django.setup()
 
 # Import your models
+from main_app.chess import grant_titles, record_games
 from main_app.models import ArtworkGallery, Laptop, ChessPlayer, Meal, Dungeon, Workout
+from main_app.reports import render, stream_rows
 # Create and check models
 # Run and print your queries
 def show_highest_rated_art():
@@ -91,7 +93,7 @@ def change_chess_games_drawn():
     ChessPlayer.objects.all().update(games_drawn=10)
 
 def grand_chess_title_GM():
-    ChessPlayer.objects.filter(rating__ge=2400).update(title="GM")
+    ChessPlayer.objects.filter(rating__gte=2400).update(title="GM")
 
 def grand_chess_title_IM():
     ChessPlayer.objects.filter(rating__range=(2300, 2399)).update(title="IM")
@@ -102,6 +104,16 @@ def grand_chess_title_FM():
 def grand_chess_title_regular_player():
     ChessPlayer.objects.filter(rating__range=(0, 2199)).update(title="regular player")
 
+def grand_chess_titles():
+    # All four bands above in one UPDATE ... SET title = CASE ...
+    return grant_titles()
+
+def record_chess_games(games):
+    # games: [(white username, black username, '1-0' / '0-1' / '1/2-1/2'), ...]
+    return record_games(games)
+
+# print(record_chess_games([('Player1', 'Player2', '1-0'), ('Player2', 'Player1', '1/2-1/2')]))
+
 #
 # player1 = ChessPlayer(username='Player1', title='no title', rating=2200, games_played=50, games_won=20, games_lost=25, games_drawn=5,)
 # player2 = ChessPlayer( username='Player2', title='IM', rating=2350, games_played=80, games_won=40, games_lost=25, games_drawn=15, )
@@ -154,11 +166,11 @@ def delete_lunch_and_snack_meals():
 
 def show_hard_dungeons():
     dn = Dungeon.objects.filter(difficulty="Hard").order_by('-location')
-    r = ''
-    for d in dn:
-        r += f"{d.name} is guarded by {d.boss_name} who has {d.boss_health} health points!"
-
-    return r
+    return render(stream_rows(
+        dn,
+        ['name', 'boss_name', 'boss_health'],
+        "{} is guarded by {} who has {} health points!",
+    ))
 
 def bulk_create_dungeons(args: List[Dungeon]):
     Dungeon.objects.bulk_create(args)
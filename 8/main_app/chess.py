@@ -0,0 +1,109 @@
+from typing import Dict, Iterable, Tuple, Union
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Case, Value, When
+
+from main_app.models import ChessPlayer
+
+RESULTS: Dict[str, float] = {'1-0': 1.0, '0-1': 0.0, '1/2-1/2': 0.5, '½-½': 0.5}
+# (lowest rating, title), checked from the top
+TITLE_BANDS: Tuple[Tuple[int, str], ...] = ((2400, 'GM'), (2300, 'IM'), (2200, 'FM'))
+DEFAULT_TITLE = 'regular player'
+
+
+def title_band():
+    """
+    CASE WHEN rating >= 2400 THEN 'GM' WHEN rating >= 2300 THEN 'IM'
+         WHEN rating >= 2200 THEN 'FM' ELSE 'regular player' END
+    """
+    return Case(
+        *(When(rating__gte=rating, then=Value(title)) for rating, title in TITLE_BANDS),
+        default=Value(DEFAULT_TITLE),
+    )
+
+
+def grant_titles(queryset=None) -> int:
+    # One UPDATE for every band instead of one per title
+    queryset = ChessPlayer.objects.all() if queryset is None else queryset
+    return queryset.update(title=title_band())
+
+
+def k_factors(ratings: np.ndarray, games_played: np.ndarray) -> np.ndarray:
+    # FIDE: 40 for the first 30 games, 10 from 2400 up, 20 otherwise
+    return np.where(games_played < 30, 40, np.where(ratings >= 2400, 10, 20))
+
+
+def white_score(result: Union[str, float]) -> float:
+    if isinstance(result, str):
+        try:
+            return RESULTS[result.strip()]
+        except KeyError:
+            raise ValueError(f"Unknown result {result!r}, expected one of {', '.join(RESULTS)}")
+    if result not in (0, 0.5, 1):
+        raise ValueError(f"Unknown result {result!r}, expected 1, 0.5 or 0 for white")
+    return float(result)
+
+
+def record_games(games: Iterable[Tuple[str, str, Union[str, float]]]) -> Dict[str, int]:
+    """
+    Applies a batch of (white username, black username, result) games,
+    result is '1-0', '0-1', '1/2-1/2' or white's score 1, 0.5, 0.
+
+    The batch is rated as one rating period: every expected score uses the ratings from before the batch,
+    so the order of the games doesn't matter and all deltas come from one pass over NumPy arrays.
+    Ratings and the games_* counters are written with one bulk_update, then the titles of the players
+    in the batch are re-banded with one UPDATE. Returns {'games', 'players'}.
+    """
+    games = list(games)
+    if not games:
+        return {'games': 0, 'players': 0}
+    usernames = sorted({g[0] for g in games} | {g[1] for g in games})
+    index = {username: i for i, username in enumerate(usernames)}
+
+    white = np.fromiter((index[g[0]] for g in games), dtype=np.intp, count=len(games))
+    black = np.fromiter((index[g[1]] for g in games), dtype=np.intp, count=len(games))
+    score = np.fromiter((white_score(g[2]) for g in games), dtype=np.float64, count=len(games))
+    if np.any(white == black):
+        raise ValueError("A player can't play against themselves")
+
+    with transaction.atomic():
+        players = {p.username: p for p in ChessPlayer.objects.select_for_update().filter(username__in=usernames)}
+        missing = [username for username in usernames if username not in players]
+        if missing:
+            raise ValueError(f"Unknown players: {', '.join(missing)}")
+        players = [players[username] for username in usernames]
+
+        ratings = np.array([p.rating for p in players], dtype=np.float64)
+        played = np.array([p.games_played for p in players], dtype=np.int64)
+        k = k_factors(ratings, played)
+
+        expected_white = 1.0 / (1.0 + 10.0 ** ((ratings[black] - ratings[white]) / 400.0))
+        delta = score - expected_white
+
+        n = len(players)
+        change = np.zeros(n)
+        np.add.at(change, white, k[white] * delta)
+        np.add.at(change, black, -k[black] * delta)
+        new_ratings = np.maximum(np.rint(ratings + change), 0).astype(np.int64)
+
+        both = np.concatenate((white, black))
+        games_played = np.bincount(both, minlength=n)
+        games_won = np.bincount(white[score == 1], minlength=n) + np.bincount(black[score == 0], minlength=n)
+        games_lost = np.bincount(white[score == 0], minlength=n) + np.bincount(black[score == 1], minlength=n)
+        games_drawn = np.bincount(both[np.concatenate((score == 0.5, score == 0.5))], minlength=n)
+
+        for i, player in enumerate(players):
+            player.rating = int(new_ratings[i])
+            player.games_played += int(games_played[i])
+            player.games_won += int(games_won[i])
+            player.games_lost += int(games_lost[i])
+            player.games_drawn += int(games_drawn[i])
+
+        # batch_size=None lets Django split only where the database has a parameter limit (SQLite)
+        ChessPlayer.objects.bulk_update(
+            players, ['rating', 'games_played', 'games_won', 'games_lost', 'games_drawn'], batch_size=None,
+        )
+        grant_titles(ChessPlayer.objects.filter(pk__in=[p.pk for p in players]))
+
+    return {'games': len(games), 'players': n}
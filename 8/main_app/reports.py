@@ -0,0 +1,18 @@
+from typing import Iterable, Iterator, Sequence
+
+CHUNK_SIZE: int = 2000
+
+
+def stream_rows(queryset, fields: Sequence[str], line: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yields line.format(*row) for every row of the queryset.
+    Only the given columns are selected and the rows are fetched chunk_size at a time
+    (a server-side cursor on PostgreSQL), so memory stays the same for any table size.
+    """
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        yield line.format(*row)
+
+
+def render(lines: Iterable[str]) -> str:
+    # One join instead of result += line, which copies the whole string every time
+    return ''.join(lines)
@@ -1,3 +1,57 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from main_app.chess import grant_titles, record_games
+from main_app.models import ChessPlayer
+
+
+class RecordGamesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        ChessPlayer.objects.bulk_create([
+            ChessPlayer(username='Player1', rating=2395, games_played=50),
+            ChessPlayer(username='Player2', rating=2395, games_played=50),
+            ChessPlayer(username='Newcomer', rating=1500),
+        ])
+
+    def test_ratings_counters_and_titles(self):
+        with CaptureQueriesContext(connection) as ctx:
+            result = record_games([('Player1', 'Player2', '1-0'), ('Player2', 'Player1', '1/2-1/2')])
+        self.assertEqual(result, {'games': 2, 'players': 2})
+        # SELECT ... FOR UPDATE, the bulk_update and the title UPDATE (the savepoints don't count)
+        queries = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(queries), 3)
+
+        p1 = ChessPlayer.objects.get(username='Player1')
+        p2 = ChessPlayer.objects.get(username='Player2')
+        # K=20, expected 0.5 both games: +10 for the win, 0 for the draw
+        self.assertEqual((p1.rating, p2.rating), (2405, 2385))
+        self.assertEqual((p1.games_played, p1.games_won, p1.games_lost, p1.games_drawn), (52, 1, 0, 1))
+        self.assertEqual((p2.games_played, p2.games_won, p2.games_lost, p2.games_drawn), (52, 0, 1, 1))
+        self.assertEqual((p1.title, p2.title), ('GM', 'IM'))
+        self.assertEqual(ChessPlayer.objects.get(username='Newcomer').title, 'no title')
+
+    def test_order_of_games_does_not_matter(self):
+        games = [('Newcomer', 'Player1', '1-0'), ('Player2', 'Newcomer', 0.5), ('Player1', 'Player2', '0-1')]
+        record_games(games)
+        first = list(ChessPlayer.objects.order_by('username').values_list('rating', flat=True))
+        ChessPlayer.objects.update(rating=0)
+        ChessPlayer.objects.filter(username='Newcomer').update(rating=1500, games_played=0)
+        ChessPlayer.objects.exclude(username='Newcomer').update(rating=2395, games_played=50)
+        record_games(reversed(games))
+        second = list(ChessPlayer.objects.order_by('username').values_list('rating', flat=True))
+        self.assertEqual(first, second)
+
+    def test_unknown_player_changes_nothing(self):
+        with self.assertRaises(ValueError):
+            record_games([('Player1', 'Nobody', '1-0')])
+        self.assertEqual(ChessPlayer.objects.get(username='Player1').games_played, 50)
+
+    def test_grant_titles(self):
+        ChessPlayer.objects.filter(username='Newcomer').update(rating=2250)
+        self.assertEqual(grant_titles(), 3)
+        self.assertEqual(
+            dict(ChessPlayer.objects.values_list('username', 'title')),
+            {'Player1': 'IM', 'Player2': 'IM', 'Newcomer': 'FM'},
+        )
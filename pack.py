@@ -1,42 +1,310 @@
 import os
+import sys
+import copy
+import glob
+import time
+import argparse
+import traceback
+import json
+import struct
+import hashlib
 import zipfile
 import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def pack(folder_name):
+SKIP_DIRS = ('venv', '.venv', '__pycache__', '.git', '.idea', '.vscode')
+INCLUDE_FILES = ('requirements.txt', 'manage.py', 'caller.py')
+INCLUDE_DIRS = ('main_app', 'orm_skeleton', 'migrations')
+
+MANIFEST_NAME = '.pack_manifest.json'
+
+# Files that are already compressed gain nothing from deflate, they are stored as they are
+STORED_EXTENSIONS = (
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.whl', '.jar',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.mp3', '.mp4', '.pdf',
+)
+
+
+def collect_files(folder_name):
+    """
+    Returns a sorted list of (file_path, archive_path) pairs
+    for every file that belongs in the submission.
+    """
+    result = []
+    for root, dirs, files in os.walk(folder_name):
+        # Skip unwanted directories inside the folder
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+
+        current_dir = os.path.basename(root)
+
+        for file in files:
+            file_path = os.path.join(root, file)
+            # Make archive path relative to the folder_name, so the zip structure is correct
+            archive_path = os.path.relpath(file_path, folder_name).replace(os.sep, '/')
+
+            # Only include specific files/folders
+            if file in INCLUDE_FILES or current_dir in INCLUDE_DIRS:
+                result.append((file_path, archive_path))
+
+    return sorted(result, key=lambda pair: pair[1])
+
+
+def file_digest(file_path):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_manifest(folder_name):
+    path = os.path.join(folder_name, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'archive': None, 'files': {}}
+
+
+def save_manifest(folder_name, manifest):
+    path = os.path.join(folder_name, MANIFEST_NAME)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def scan_files(files, old_entries):
+    """
+    Builds the manifest entries for the current files.
+    A file is only re-hashed when its size or mtime differs from the old entry.
+    """
+    entries = {}
+    for file_path, archive_path in files:
+        st = os.stat(file_path)
+        old = old_entries.get(archive_path)
+        if old and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns:
+            digest = old['sha256']
+        else:
+            digest = file_digest(file_path)
+        entries[archive_path] = {'sha256': digest, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    return entries
+
+
+def digests(entries):
+    return {archive_path: entry['sha256'] for archive_path, entry in entries.items()}
+
+
+def copy_raw_entry(src, dst, info):
+    """
+    Copies an already compressed member from src into dst without
+    decompressing it: the local header is rebuilt and the raw bytes are copied as they are.
+    """
+    src.fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, src.fp.read(zipfile.sizeFileHeader))
+    # Skip the name and extra field of the old local header
+    src.fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], 1)
+    raw = src.fp.read(info.compress_size)
+
+    new_info = copy.copy(info)
+    # The sizes and CRC go into the local header, so no data descriptor is needed
+    new_info.flag_bits &= ~0x08
+    new_info.header_offset = dst.fp.tell()
+
+    dst.fp.write(new_info.FileHeader())
+    dst.fp.write(raw)
+    dst.start_dir = dst.fp.tell()
+    dst.filelist.append(new_info)
+    dst.NameToInfo[new_info.filename] = new_info
+    dst._didModify = True
+
+
+def compress_type_for(archive_path):
+    if archive_path.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def write_entry(zipf, file_path, archive_path, compresslevel=None):
+    compress_type = compress_type_for(archive_path)
+    level = compresslevel if compress_type == zipfile.ZIP_DEFLATED else None
+    zipf.write(file_path, archive_path, compress_type=compress_type, compresslevel=level)
+
+
+def pack_to_stream(folder_name, stream, compresslevel=None):
+    """
+    Writes the submission archive of the folder straight into a binary stream
+    (stdout, a pipe or a socket) without creating a file on disk.
+    """
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for file_path, archive_path in collect_files(folder_name):
+            write_entry(zipf, file_path, archive_path, compresslevel)
+
+
+def pack(folder_name, incremental=False, compresslevel=None):
     """
     Packages selected project files into a zip archive,
     excluding virtual environments and unnecessary directories,
     only inside the specified folder.
+
+    With incremental=True a hash manifest is kept next to the archive and
+    unchanged files are copied from the previous archive as raw compressed bytes,
+    so only the changed files are compressed again.
+
+    compresslevel is the deflate level (0-9) used for files that are not already compressed.
     """
+    files = collect_files(folder_name)
+
+    old_manifest = load_manifest(folder_name) if incremental else {'archive': None, 'files': {}}
+    # Entries compressed with another level can't be reused as they are
+    if old_manifest.get('compresslevel') != compresslevel:
+        old_manifest = {'archive': None, 'files': {}}
+    old_archive = None
+    if old_manifest['archive'] and os.path.isfile(os.path.join(folder_name, old_manifest['archive'])):
+        old_archive = os.path.join(folder_name, old_manifest['archive'])
+
+    entries = scan_files(files, old_manifest['files']) if incremental else {}
+
+    # Only the contents count, a touch or a checkout changes the mtimes but not the archive
+    if incremental and old_archive and digests(entries) == digests(old_manifest['files']):
+        if entries != old_manifest['files']:
+            # Keep the new mtimes, so the files are not hashed again next time
+            save_manifest(folder_name, {**old_manifest, 'files': entries})
+        print('Submission is up to date!')
+        return old_archive
+
+    dt = datetime.datetime.now().strftime('%H-%M_%d.%m.%y')
+    output_zip = os.path.join(folder_name, f'submission-{dt}.zip')
+    # Write next to the old archive first, it can have the same name if packed in the same minute
+    tmp_zip = output_zip + '.tmp'
+
+    reused = 0
+    src = zipfile.ZipFile(old_archive) if old_archive else None
+    try:
+        with zipfile.ZipFile(tmp_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for file_path, archive_path in files:
+                old = old_manifest['files'].get(archive_path)
+                if (
+                    src is not None
+                    and old is not None
+                    and old['sha256'] == entries[archive_path]['sha256']
+                    and archive_path in src.NameToInfo
+                ):
+                    copy_raw_entry(src, zipf, src.NameToInfo[archive_path])
+                    reused += 1
+                else:
+                    write_entry(zipf, file_path, archive_path, compresslevel)
+    finally:
+        if src is not None:
+            src.close()
+
     # Remove old archives in the folder
     for item in os.listdir(folder_name):
         if item.endswith(".zip"):
             os.remove(os.path.join(folder_name, item))
+    os.replace(tmp_zip, output_zip)
 
-    dt = datetime.datetime.now().strftime('%H-%M_%d.%m.%y')
-    output_zip = os.path.join(folder_name, f'submission-{dt}.zip')
+    if incremental:
+        save_manifest(folder_name, {
+            'archive': os.path.basename(output_zip),
+            'compresslevel': compresslevel,
+            'files': entries,
+        })
+        print(f'Submission created! ({len(files) - reused} compressed, {reused} reused)')
+    else:
+        # A full pack makes any old manifest stale
+        if os.path.isfile(os.path.join(folder_name, MANIFEST_NAME)):
+            os.remove(os.path.join(folder_name, MANIFEST_NAME))
+        print('Submission created!')
 
-    with zipfile.ZipFile(output_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(folder_name):
-            # Skip unwanted directories inside the folder
-            dirs[:] = [d for d in dirs if d not in ('venv', '.venv', '__pycache__', '.git', '.idea', '.vscode')]
+    return output_zip
 
-            current_dir = os.path.basename(root)
 
-            for file in files:
-                file_path = os.path.join(root, file)
-                # Make archive path relative to the folder_name, so the zip structure is correct
-                archive_path = os.path.relpath(file_path, folder_name)
+def find_project_folders(patterns=None):
+    """
+    Returns the project folders matching the given glob patterns,
+    or all numbered project folders (0, 1, ... 16) when no pattern is given.
+    """
+    if not patterns:
+        folders = [d for d in os.listdir('.') if d.isdigit() and os.path.isdir(d)]
+    else:
+        folders = set()
+        for pattern in patterns:
+            matched = [d for d in glob.glob(pattern) if os.path.isdir(d)]
+            if not matched:
+                raise FileNotFoundError(f'No folder matches {pattern!r}')
+            folders.update(matched)
+    return sorted(folders, key=lambda d: (not d.isdigit(), int(d) if d.isdigit() else 0, d))
 
-                # Only include specific files/folders
-                if (
-                    file in ['requirements.txt', 'manage.py', 'caller.py']
-                    or current_dir in ['main_app', 'orm_skeleton', 'migrations']
-                ):
-                    zipf.write(file_path, archive_path)
 
-    print('Submission created!')
+def _pack_job(folder_name, incremental, compresslevel):
+    start = time.perf_counter()
+    try:
+        pack(folder_name, incremental=incremental, compresslevel=compresslevel)
+    except Exception:
+        return folder_name, time.perf_counter() - start, traceback.format_exc()
+    return folder_name, time.perf_counter() - start, None
+
+
+def pack_all(folders, incremental=False, workers=None, compresslevel=None):
+    """
+    Packs every folder in its own worker process, one archive per folder.
+    Returns a list of (folder, seconds, error) tuples in the order of folders.
+    """
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_pack_job, folder, incremental, compresslevel) for folder in folders]
+        for future in as_completed(futures):
+            folder, seconds, error = future.result()
+            results[folder] = (folder, seconds, error)
+    return [results[folder] for folder in folders]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Package project folders into submission archives.')
+    parser.add_argument('folders', nargs='*', help='folder names or glob patterns (default: all numbered folders)')
+    parser.add_argument('--all', action='store_true', help='pack all numbered project folders')
+    parser.add_argument('-i', '--incremental', action='store_true', help='reuse unchanged entries from the previous archive')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='number of worker processes')
+    parser.add_argument('-l', '--level', type=int, choices=range(10), default=None, metavar='0-9',
+                        help='deflate compression level')
+    parser.add_argument('--stdout', action='store_true', help='write the archive of a single folder to stdout')
+    args = parser.parse_args(argv)
+
+    if args.stdout:
+        if len(args.folders) != 1 or args.all or args.incremental:
+            parser.error('--stdout takes exactly one folder and no --all/--incremental')
+        pack_to_stream(args.folders[0], sys.stdout.buffer, compresslevel=args.level)
+        sys.stdout.buffer.flush()
+        return 0
+
+    if not args.folders and not args.all:
+        folder = input('Folder name: ')
+        pack(folder, incremental=args.incremental, compresslevel=args.level)
+        return 0
+
+    try:
+        folders = find_project_folders(args.folders)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if not folders:
+        print('No folders matched!', file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    results = pack_all(folders, incremental=args.incremental, workers=args.jobs, compresslevel=args.level)
+    total = time.perf_counter() - start
+
+    print()
+    failed = 0
+    for folder, seconds, error in results:
+        status = 'ok' if error is None else 'FAILED'
+        print(f'{folder:>6} {seconds:8.2f}s  {status}')
+        if error is not None:
+            failed += 1
+            print(error, file=sys.stderr)
+    print(f'Packed {len(results) - failed}/{len(results)} folders in {total:.2f}s')
+
+    return 1 if failed else 0
 
 if __name__ == '__main__':
-    folder = input('Folder name: ')
-    pack(folder)
+    sys.exit(main())
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+import zipfile
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pack import MANIFEST_NAME, load_manifest, pack
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+class IncrementalPackTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = self.tmp.name
+        self.files = {
+            'caller.py': 'print("caller")\n' * 50,
+            'manage.py': 'print("manage")\n' * 50,
+            'main_app/models.py': 'from django.db import models\n' * 50,
+            'main_app/migrations/0001_initial.py': 'operations = []\n' * 50,
+        }
+        for name, content in self.files.items():
+            write(os.path.join(self.folder, name), content)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def pack(self):
+        out = StringIO()
+        with redirect_stdout(out):
+            archive = pack(self.folder, incremental=True)
+        return archive, out.getvalue()
+
+    def assert_archive_matches(self, archive):
+        with zipfile.ZipFile(archive) as zipf:
+            self.assertIsNone(zipf.testzip())
+            self.assertEqual(sorted(zipf.namelist()), sorted(self.files))
+            for name, content in self.files.items():
+                self.assertEqual(zipf.read(name).decode('utf-8'), content)
+
+    def test_repack_reuses_unchanged_entries(self):
+        first, _ = self.pack()
+        self.assert_archive_matches(first)
+
+        self.files['main_app/models.py'] = 'class Changed:\n    pass\n'
+        write(os.path.join(self.folder, 'main_app/models.py'), self.files['main_app/models.py'])
+        # The archive name has minute precision, make sure the old one is really replaced
+        os.rename(first, os.path.join(self.folder, 'submission-old.zip'))
+        manifest = load_manifest(self.folder)
+        manifest['archive'] = 'submission-old.zip'
+        with open(os.path.join(self.folder, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+
+        second, output = self.pack()
+        self.assertIn('1 compressed, 3 reused', output)
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'submission-old.zip')))
+        self.assert_archive_matches(second)
+
+    def test_touch_does_not_repack(self):
+        first, _ = self.pack()
+        with open(first, 'rb') as f:
+            before = f.read()
+        later = time.time() + 10
+        for name in self.files:
+            os.utime(os.path.join(self.folder, name), (later, later))
+
+        second, output = self.pack()
+        self.assertIn('up to date', output)
+        self.assertEqual(second, first)
+        with open(second, 'rb') as f:
+            self.assertEqual(f.read(), before)
+        # The new mtimes are remembered, so the next run doesn't hash again
+        entry = load_manifest(self.folder)['files']['caller.py']
+        self.assertEqual(entry['mtime_ns'], os.stat(os.path.join(self.folder, 'caller.py')).st_mtime_ns)
+
+
+if __name__ == '__main__':
+    unittest.main()